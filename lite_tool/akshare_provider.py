@@ -2,24 +2,82 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, timedelta
+import json
 from pathlib import Path
 import random
+import threading
 import time
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 
 import pandas as pd
 
-from .config import FETCH_RETRIES, HISTORY_LOOKBACK_DAYS, MIN_HISTORY_BARS, RETRY_BASE_WAIT_SECONDS
-from .config import CACHE_DIR
+from .config import (
+    FETCH_RETRIES,
+    HISTORY_LOOKBACK_DAYS,
+    HISTORY_STORE_DAYS,
+    MIN_HISTORY_BARS,
+    RETRY_BASE_WAIT_SECONDS,
+)
+from .config import RATE_LIMIT_WAIT_SECONDS
+from .config import ADJUST_OVERLAP_DAYS, ADJUST_PRICE_TOLERANCE, CACHE_DIR, SPOT_MEMO_TTL_SECONDS
+from .config import INDUSTRY_REFRESH_DAYS
+from .profiling import timed_import
+from .resample import DAILY, resample_bars
+from .store import PriceStore
+from .tracing import span
+from .trading_calendar import TradingCalendar
+
+
+# Failure buckets reported per symbol (run summary, batch errors, backfill).
+NETWORK_ERROR = "network"
+DATA_ERROR = "data"
 
 
 class DataProviderError(RuntimeError):
+    # Base of all provider failures. Each subclass carries its bucket and its
+    # retry policy; the base class is a deterministic data error.
+    error_type = DATA_ERROR
+    retryable = False
+    retry_wait_seconds = RETRY_BASE_WAIT_SECONDS
+
+
+class TransientNetworkError(DataProviderError):
+    error_type = NETWORK_ERROR
+    retryable = True
+
+
+class RateLimitedError(TransientNetworkError):
+    # Throttled by the upstream site: back off longer than for a dropped
+    # connection.
+    retry_wait_seconds = RATE_LIMIT_WAIT_SECONDS
+
+
+class UpstreamEmptyError(DataProviderError):
     pass
 
 
+class SchemaDriftError(DataProviderError):
+    pass
+
+
+class InvalidSymbolError(DataProviderError, ValueError):
+    pass
+
+
+PROVIDER_ERRORS = (
+    DataProviderError,
+    TransientNetworkError,
+    RateLimitedError,
+    UpstreamEmptyError,
+    SchemaDriftError,
+    InvalidSymbolError,
+)
+
+
 def _import_akshare():
     try:
-        import akshare as ak  # type: ignore
+        with timed_import("akshare"):
+            import akshare as ak  # type: ignore
     except ImportError as exc:
         raise DataProviderError(
             "未安装 akshare，请先执行: pip install -r requirements.txt"
@@ -30,7 +88,7 @@ def _import_akshare():
 def normalize_symbol(symbol: str) -> str:
     s = symbol.strip().upper().replace(".SH", "").replace(".SZ", "")
     if not s.isdigit() or len(s) != 6:
-        raise ValueError(f"无效股票代码: {symbol}")
+        raise InvalidSymbolError(f"无效股票代码: {symbol}")
     return s
 
 
@@ -40,51 +98,92 @@ class Candidate:
     name: str
 
 
-def classify_error(exc: Exception) -> str:
-    msg = str(exc).lower()
-    network_signals = [
-        "connection",
-        "timeout",
-        "timed out",
-        "remote end closed",
-        "ssl",
-        "max retries",
-        "http",
-        "temporarily unavailable",
-    ]
-    return "network" if any(sig in msg for sig in network_signals) else "data"
+def as_provider_error(exc: BaseException) -> DataProviderError:
+    # Maps what akshare lets through onto the hierarchy by type. requests'
+    # exceptions derive from OSError, as do socket timeouts and resets.
+    if isinstance(exc, DataProviderError):
+        return exc
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status in (403, 429):
+        return RateLimitedError(str(exc))
+    if status is not None and 400 <= status < 500:
+        return DataProviderError(str(exc))
+    if isinstance(exc, (OSError, json.JSONDecodeError)):
+        # A truncated or blocked response fails JSON decoding, too.
+        return TransientNetworkError(str(exc))
+    if isinstance(exc, (KeyError, IndexError, AttributeError, TypeError)):
+        # akshare indexing into a payload whose layout changed.
+        return SchemaDriftError(f"数据格式异常：{type(exc).__name__}: {exc}")
+    return DataProviderError(str(exc))
+
+
+def classify_error(exc: BaseException) -> str:
+    return as_provider_error(exc).error_type
 
 
 def _call_with_retry(
     call: Callable[[], Any],
     retries: int = FETCH_RETRIES,
-    wait_seconds: float = RETRY_BASE_WAIT_SECONDS,
+    label: str = "akshare",
 ) -> Any:
-    last_error: Exception | None = None
-    for attempt in range(1, retries + 1):
-        try:
-            return call()
-        except Exception as exc:  # pragma: no cover
-            last_error = exc
-            if attempt < retries:
+    # Only retryable classes (network, rate limit) are retried, with
+    # exponential backoff from the class's retry_wait_seconds; data errors
+    # fail on the first attempt.
+    with span("provider.call", api=label) as s:
+        backoff_total = 0.0
+        for attempt in range(1, retries + 1):
+            s.set(attempts=attempt)
+            try:
+                return call()
+            except Exception as exc:  # pragma: no cover
+                error = as_provider_error(exc)
+                if not error.retryable or attempt >= retries:
+                    s.set(error=type(error).__name__)
+                    if error is exc:
+                        raise
+                    raise error from exc
+                wait_seconds = error.retry_wait_seconds
                 backoff = wait_seconds * (2 ** (attempt - 1))
                 jitter = random.uniform(0.0, wait_seconds * 0.5)
+                backoff_total += backoff + jitter
+                s.set(backoff_seconds=round(backoff_total, 3))
                 time.sleep(backoff + jitter)
-    if last_error is None:
-        raise DataProviderError("未知数据错误。")
-    raise DataProviderError(str(last_error)) from last_error
+    raise DataProviderError("未知数据错误。")
+
 
+def download_trade_dates() -> List[date]:
+    ak = _import_akshare()
+    df = _call_with_retry(lambda: ak.tool_trade_date_hist_sina(), label="tool_trade_date_hist_sina")
+    if df is None or df.empty or "trade_date" not in df.columns:
+        raise UpstreamEmptyError("AKShare 未返回交易日历。")
+    return [d.date() for d in pd.to_datetime(df["trade_date"], errors="coerce").dropna()]
 
-def _ensure_cache_dir() -> Path:
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    return CACHE_DIR
+
+def _last_bar_date(hist: pd.DataFrame) -> date | None:
+    if hist.empty or "date" not in hist.columns:
+        return None
+    try:
+        return date.fromisoformat(str(hist["date"].iloc[-1])[:10])
+    except ValueError:
+        return None
+
+
+def _lookback_window(hist: pd.DataFrame) -> pd.DataFrame:
+    # The last HISTORY_LOOKBACK_DAYS bars of a stored history for daily
+    # scoring. The iloc slice shares the stored blocks and setting its index
+    # copies nothing (tail().reset_index() would copy on pandas 2).
+    if len(hist) <= HISTORY_LOOKBACK_DAYS:
+        return hist
+    window = hist.iloc[-HISTORY_LOOKBACK_DAYS:]
+    window.index = pd.RangeIndex(len(window))
+    return window
 
 
 def _pick_first_existing(df: pd.DataFrame, columns: List[str]) -> str:
     for col in columns:
         if col in df.columns:
             return col
-    raise DataProviderError(f"数据字段异常，未找到候选字段: {columns}")
+    raise SchemaDriftError(f"数据字段异常，未找到候选字段: {columns}")
 
 
 def _clean_name(raw: object) -> str:
@@ -95,7 +194,73 @@ def _clean_name(raw: object) -> str:
     return "".join(name.split())
 
 
+CACHE_HIT = "hit"
+CACHE_STALE = "stale"
+CACHE_COLD = "cold"
+
+SPOT_VOLUME_IN_SHARES = "volume_in_shares"
+# Daily-bar column <- spot snapshot column, used to patch the latest bar.
+SPOT_BAR_COLUMNS = {
+    "open": "今开",
+    "high": "最高",
+    "low": "最低",
+    "close": "最新价",
+    "volume": "成交量",
+    "turnover": "成交额",
+    "pct_change": "涨跌幅",
+    "振幅": "振幅",
+    "涨跌额": "涨跌额",
+    "换手率": "换手率",
+}
+
+# Fundamentals table column <- spot snapshot column (stock_zh_a_spot_em).
+SPOT_FUNDAMENTAL_COLUMNS = {
+    "pe": "市盈率-动态",
+    "pb": "市净率",
+    "total_mv": "总市值",
+    "float_mv": "流通市值",
+}
+FUNDAMENTAL_COLUMNS = [*SPOT_FUNDAMENTAL_COLUMNS, "pe_percentile"]
+
+BAR_PATCHED = "patched"
+BAR_APPENDED = "appended"
+BAR_UNCHANGED = "unchanged"
+BAR_SKIPPED = "skipped"
+BAR_ADJUSTED = "adjusted"
+
+
 class AKShareProvider:
+    def __init__(
+        self,
+        store: PriceStore | None = None,
+        cache_dir: Path = CACHE_DIR,
+        calendar: TradingCalendar | None = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.store = store or PriceStore(cache_dir=cache_dir)
+        self.calendar = calendar or TradingCalendar(
+            cache_dir / "trade_calendar.csv", loader=self._download_trade_dates
+        )
+        self._memo_lock = threading.Lock()
+        self._spot_memo: Tuple[float, pd.DataFrame] | None = None
+        self._name_memo: Dict[str, Dict[str, str]] = {}
+        self._auto_memo: Dict[Tuple[str, int], List[Candidate]] = {}
+        self._spot_patched: Dict[str, float] = {}
+        # Symbols with an adjustment event seen in a spot snapshot; their next
+        # refresh skips the overlap check and rebuilds.
+        self._adjusted: set = set()
+        # (session key, table, built from today's snapshot); the build has its
+        # own lock so scoring workers asking at once share one spot download.
+        self._fundamentals_memo: Tuple[str, pd.DataFrame, bool] | None = None
+        self._fundamentals_lock = threading.Lock()
+        self._fundamentals_retry_after = 0.0
+        self._industry_memo: Tuple[float, Dict[str, str]] | None = None
+        self._industry_lock = threading.Lock()
+
+    def _ensure_cache_dir(self) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return self.cache_dir
+
     def _auto_cache_paths(self, cache_dir: Path, limit: int) -> List[Path]:
         exact = sorted(cache_dir.glob(f"auto_candidates_*_{limit}.csv"), reverse=True)
         if exact:
@@ -125,25 +290,59 @@ class AKShareProvider:
         return []
 
     def _fetch_spot_dataframe(self) -> pd.DataFrame:
+        with span("spot.fetch") as s:
+            with self._memo_lock:
+                memo = self._spot_memo
+            if memo is not None and (
+                time.time() - memo[0] < SPOT_MEMO_TTL_SECONDS
+                or self.calendar.snapshot_is_current(memo[0])
+            ):
+                s.set(cache="hit", rows=len(memo[1]))
+                return memo[1]
+            s.set(cache="miss")
+            df = self._download_spot_dataframe()
+            s.set(rows=len(df), bytes=int(df.memory_usage(index=False).sum()))
+            with self._memo_lock:
+                self._spot_memo = (time.time(), df)
+            return df
+
+    def _download_spot_dataframe(self) -> pd.DataFrame:
         ak = _import_akshare()
         errors: List[str] = []
+        error_cls = UpstreamEmptyError
         df = None
         if hasattr(ak, "stock_zh_a_spot_em"):
             try:
-                df = _call_with_retry(lambda: ak.stock_zh_a_spot_em())
-            except Exception as exc:  # pragma: no cover
+                df = _call_with_retry(lambda: ak.stock_zh_a_spot_em(), label="stock_zh_a_spot_em")
+            except DataProviderError as exc:  # pragma: no cover
                 errors.append(f"stock_zh_a_spot_em: {exc}")
+                error_cls = type(exc)
         if (df is None or df.empty) and hasattr(ak, "stock_zh_a_spot"):
             try:
-                df = _call_with_retry(lambda: ak.stock_zh_a_spot())
-            except Exception as exc:  # pragma: no cover
+                df = _call_with_retry(lambda: ak.stock_zh_a_spot(), label="stock_zh_a_spot")
+                # The Sina feed reports volume in shares; daily bars use lots.
+                df.attrs[SPOT_VOLUME_IN_SHARES] = True
+            except DataProviderError as exc:  # pragma: no cover
                 errors.append(f"stock_zh_a_spot: {exc}")
+                error_cls = type(exc)
         if df is None or df.empty:
             detail = " | ".join(errors) if errors else "未知错误"
-            raise DataProviderError(f"AKShare 未返回A股行情数据。{detail}")
+            raise error_cls(f"AKShare 未返回A股行情数据。{detail}")
         return df
 
+    def _download_trade_dates(self) -> Iterable[date]:
+        return download_trade_dates()
+
+    def _session_key(self) -> str:
+        # Daily artifacts are keyed by the latest completed session, so a
+        # weekend or holiday reuses the last trading day's files.
+        return self.calendar.latest_session().strftime("%Y%m%d")
+
     def _load_name_cache(self, path: Path) -> Dict[str, str]:
+        with self._memo_lock:
+            memo = self._name_memo.get(str(path))
+        if memo is not None:
+            return dict(memo)
         if not path.exists():
             return {}
         try:
@@ -162,16 +361,26 @@ class AKShareProvider:
             if not name:
                 continue
             name_map[code] = name
+        with self._memo_lock:
+            self._name_memo[str(path)] = dict(name_map)
         return name_map
 
     def _write_name_cache(self, path: Path, name_map: Dict[str, str]) -> None:
         rows = [{"code": code, "name": name} for code, name in sorted(name_map.items())]
         pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8")
+        with self._memo_lock:
+            self._name_memo[str(path)] = dict(name_map)
 
     def _name_cache_paths(self, cache_dir: Path) -> List[Path]:
         return [p for p in sorted(cache_dir.glob("stock_name_map_*.csv"), reverse=True) if p.is_file()]
 
     def resolve_names(self, codes: List[str]) -> Dict[str, str]:
+        with span("names.resolve", requested=len(codes)) as s:
+            name_map = self._resolve_names(codes)
+            s.set(resolved=len(name_map))
+            return name_map
+
+    def _resolve_names(self, codes: List[str]) -> Dict[str, str]:
         normalized_codes: List[str] = []
         for code in codes:
             try:
@@ -181,8 +390,8 @@ class AKShareProvider:
         if not normalized_codes:
             return {}
 
-        cache_dir = _ensure_cache_dir()
-        today_key = date.today().strftime("%Y%m%d")
+        cache_dir = self._ensure_cache_dir()
+        today_key = self._session_key()
         today_cache_path = cache_dir / f"stock_name_map_{today_key}.csv"
 
         name_map = self._load_name_cache(today_cache_path)
@@ -224,12 +433,22 @@ class AKShareProvider:
         return {code: name_map[code] for code in normalized_codes if code in name_map}
 
     def get_auto_candidates(self, limit: int) -> List[Candidate]:
-        cache_dir = _ensure_cache_dir()
-        today_key = date.today().strftime("%Y%m%d")
+        with span("universe.load", limit=limit):
+            return self._get_auto_candidates(limit)
+
+    def _get_auto_candidates(self, limit: int) -> List[Candidate]:
+        cache_dir = self._ensure_cache_dir()
+        today_key = self._session_key()
         cache_path = cache_dir / f"auto_candidates_{today_key}_{limit}.csv"
+        with self._memo_lock:
+            memo = self._auto_memo.get((today_key, limit))
+        if memo is not None:
+            return list(memo)
         if cache_path.exists():
             today_cached = self._load_auto_candidates_from_cache(cache_dir, limit=limit)
             if today_cached:
+                with self._memo_lock:
+                    self._auto_memo[(today_key, limit)] = list(today_cached)
                 return today_cached
 
         try:
@@ -238,7 +457,7 @@ class AKShareProvider:
             fallback = self._load_auto_candidates_from_cache(cache_dir, limit=limit)
             if fallback:
                 return fallback
-            raise DataProviderError(f"自动候选池加载失败：{exc}") from exc
+            raise type(as_provider_error(exc))(f"自动候选池加载失败：{exc}") from exc
 
         code_col = _pick_first_existing(spot, ["代码", "symbol"])
         name_col = _pick_first_existing(spot, ["名称", "name"])
@@ -264,35 +483,299 @@ class AKShareProvider:
         pd.DataFrame([{"code": x.code, "name": x.name} for x in candidates]).to_csv(
             cache_path, index=False, encoding="utf-8"
         )
+        with self._memo_lock:
+            self._auto_memo[(today_key, limit)] = list(candidates)
         return candidates
 
-    def get_history(self, symbol: str) -> pd.DataFrame:
+    def _fundamentals_from_spot(self, spot: pd.DataFrame) -> pd.DataFrame:
+        code_col = _pick_first_existing(spot, ["代码", "symbol"])
+        table = pd.DataFrame({"code": spot[code_col].astype(str).str.extract(r"(\d{6})", expand=False)})
+        for col, spot_col in SPOT_FUNDAMENTAL_COLUMNS.items():
+            if spot_col in spot.columns:
+                table[col] = pd.to_numeric(spot[spot_col], errors="coerce").to_numpy()
+        table = table.dropna(subset=["code"]).drop_duplicates("code")
+        # The Sina fallback feed has no valuation columns at all.
+        if len(table.columns) == 1 or table.drop(columns="code").isna().all().all():
+            return pd.DataFrame(columns=["code", *SPOT_FUNDAMENTAL_COLUMNS])
+        return table
+
+    def _load_fundamentals_file(self, path: Path) -> pd.DataFrame | None:
+        try:
+            table = pd.read_csv(path, dtype={"code": str})
+        except Exception:
+            return None
+        if table.empty or "code" not in table.columns:
+            return None
+        return table
+
+    def _with_percentiles(self, table: pd.DataFrame) -> pd.DataFrame:
+        table = table.set_index("code")
+        for col in SPOT_FUNDAMENTAL_COLUMNS:
+            if col not in table.columns:
+                table[col] = float("nan")
+        pe = table["pe"]
+        # Percentile among profitable companies; loss-making ones (PE <= 0)
+        # rank as the most expensive, unknown PE stays NaN.
+        table["pe_percentile"] = pe.where(pe > 0).rank(pct=True)
+        table.loc[pe <= 0, "pe_percentile"] = 1.0
+        return table[FUNDAMENTAL_COLUMNS]
+
+    def get_fundamentals(self) -> pd.DataFrame:
+        with span("fundamentals.load") as s:
+            table = self._get_fundamentals()
+            s.set(rows=len(table))
+            return table
+
+    def _get_fundamentals(self) -> pd.DataFrame:
+        # PE/PB/market cap for the whole market come with the spot snapshot,
+        # so they are extracted in bulk and kept as one small CSV per session
+        # (code index, FUNDAMENTAL_COLUMNS). Offline, the latest older table
+        # is used and today's is retried after SPOT_MEMO_TTL_SECONDS.
+        today_key = self._session_key()
+        with self._fundamentals_lock:
+            memo = self._fundamentals_memo
+            if memo is not None and memo[0] == today_key:
+                if memo[2] or time.time() < self._fundamentals_retry_after:
+                    return memo[1]
+            cache_dir = self._ensure_cache_dir()
+            path = cache_dir / f"fundamentals_{today_key}.csv"
+            table = self._load_fundamentals_file(path)
+            complete = table is not None
+            if table is None:
+                try:
+                    table = self._fundamentals_from_spot(self._fetch_spot_dataframe())
+                except Exception:
+                    table = None
+                if table is not None and not table.empty:
+                    table.to_csv(path, index=False, encoding="utf-8")
+                    complete = True
+                else:
+                    self._fundamentals_retry_after = time.time() + SPOT_MEMO_TTL_SECONDS
+                    table = None
+                    for fallback in sorted(cache_dir.glob("fundamentals_*.csv"), reverse=True):
+                        table = self._load_fundamentals_file(fallback)
+                        if table is not None:
+                            break
+            if table is None:
+                table = pd.DataFrame(columns=["code"])
+            table = self._with_percentiles(table)
+            self._fundamentals_memo = (today_key, table, complete)
+            return table
+
+    def valuation_inputs(self, symbol: str) -> Dict[str, float]:
+        # Never fails: scoring falls back to price-only valuation.
+        try:
+            table = self.get_fundamentals()
+            code = normalize_symbol(symbol)
+            if code not in table.index:
+                return {}
+            row = table.loc[code]
+        except Exception:
+            return {}
+        return {col: float(value) for col, value in row.items() if pd.notna(value)}
+
+    def _download_industry_map(self) -> pd.DataFrame:
+        # One call per Eastmoney industry board (~90); only done when the
+        # cached mapping is older than INDUSTRY_REFRESH_DAYS.
         ak = _import_akshare()
+        boards = _call_with_retry(lambda: ak.stock_board_industry_name_em(), label="stock_board_industry_name_em")
+        board_col = _pick_first_existing(boards, ["板块名称", "name"])
+        frames = []
+        for board in boards[board_col].dropna().astype(str):
+            cons = _call_with_retry(
+                lambda: ak.stock_board_industry_cons_em(symbol=board),
+                label="stock_board_industry_cons_em",
+            )
+            code_col = _pick_first_existing(cons, ["代码", "code"])
+            frames.append(pd.DataFrame({"code": cons[code_col].astype(str), "industry": board}))
+        if not frames:
+            raise UpstreamEmptyError("AKShare 未返回行业板块数据。")
+        return pd.concat(frames, ignore_index=True)
+
+    def _read_industry_map(self, df: pd.DataFrame) -> Dict[str, str]:
+        codes = df["code"].astype(str).str.extract(r"(\d{6})", expand=False)
+        industries = df["industry"].astype(str).map(_clean_name)
+        return {
+            code: industry
+            for code, industry in zip(codes, industries)
+            if isinstance(code, str) and industry
+        }
+
+    def get_industry_map(self) -> Dict[str, str]:
+        with span("industry.load") as s:
+            industry_map = self._get_industry_map()
+            s.set(rows=len(industry_map))
+            return industry_map
+
+    def _get_industry_map(self) -> Dict[str, str]:
+        # code -> industry board name, cached as industry_map.csv. Industry
+        # membership rarely changes, so the file is refreshed only once it is
+        # INDUSTRY_REFRESH_DAYS old; a failed refresh keeps the old mapping.
+        max_age = INDUSTRY_REFRESH_DAYS * 86400
+        with self._industry_lock:
+            memo = self._industry_memo
+            if memo is not None and time.time() - memo[0] < max_age:
+                return memo[1]
+            path = self._ensure_cache_dir() / "industry_map.csv"
+            cached: Dict[str, str] = {}
+            written_at = 0.0
+            try:
+                written_at = path.stat().st_mtime
+                cached = self._read_industry_map(pd.read_csv(path, dtype=str))
+            except Exception:
+                cached = {}
+            if cached and time.time() - written_at < max_age:
+                self._industry_memo = (written_at, cached)
+                return cached
+            try:
+                industry_map = self._read_industry_map(self._download_industry_map())
+            except Exception as exc:
+                if not cached:
+                    raise type(as_provider_error(exc))(f"行业分类加载失败：{exc}") from exc
+                # Keep the outdated mapping for this process; retried on restart.
+                self._industry_memo = (time.time(), cached)
+                return cached
+            rows = [{"code": code, "industry": industry} for code, industry in sorted(industry_map.items())]
+            pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8")
+            self._industry_memo = (time.time(), industry_map)
+            return industry_map
+
+    def _is_history_current(self, code: str, hist: pd.DataFrame) -> bool:
+        if len(hist) < MIN_HISTORY_BARS:
+            return False
+        with self._memo_lock:
+            if code in self._adjusted:
+                return False
+        last_bar = _last_bar_date(hist)
+        if last_bar is None:
+            return False
+        return self.calendar.is_current(last_bar, self.store.fetched_at(code))
+
+    def history_cache_status(self, symbol: str) -> str:
         code = normalize_symbol(symbol)
-        cache_dir = _ensure_cache_dir()
-        cache_path = cache_dir / f"hist_{code}.csv"
-        if cache_path.exists():
-            hist_cache = pd.read_csv(cache_path)
-            if len(hist_cache) >= MIN_HISTORY_BARS:
-                return hist_cache.tail(HISTORY_LOOKBACK_DAYS).reset_index(drop=True)
+        hist_cache = self.store.load(code)
+        if hist_cache is None:
+            return CACHE_COLD
+        return CACHE_HIT if self._is_history_current(code, hist_cache) else CACHE_STALE
 
-        start_date = (date.today() - timedelta(days=HISTORY_LOOKBACK_DAYS * 3)).strftime(
-            "%Y%m%d"
-        )
-        end_date = date.today().strftime("%Y%m%d")
+    def get_history(self, symbol: str) -> pd.DataFrame:
+        code = normalize_symbol(symbol)
+        with span("history.get", code=code) as s:
+            with span("history.cache_read", code=code):
+                hist_cache = self.store.load(code)
+            if hist_cache is not None and self._is_history_current(code, hist_cache):
+                s.set(cache="hit", rows=len(hist_cache))
+                return _lookback_window(hist_cache)
+            s.set(cache="stale" if hist_cache is not None else "miss")
 
-        df = _call_with_retry(
+            try:
+                hist = None
+                if hist_cache is not None:
+                    hist = self._update_history(code, hist_cache)
+                if hist is None:
+                    hist = self._rebuild_history(code)
+                    s.set(update="full")
+                else:
+                    s.set(update="overlap")
+            except DataProviderError:
+                # Offline or rate-limited: an outdated but complete cache still
+                # beats failing the symbol.
+                if hist_cache is None or len(hist_cache) < MIN_HISTORY_BARS:
+                    raise
+                s.set(cache="stale_fallback", rows=len(hist_cache))
+                return _lookback_window(hist_cache)
+
+            with span("history.cache_write", code=code):
+                self.store.save(code, hist)
+            with self._memo_lock:
+                self._adjusted.discard(code)
+            s.set(rows=len(hist))
+            return _lookback_window(hist.copy(deep=False))
+
+    def _download_window(self, code: str, start: date, window: str) -> pd.DataFrame | None:
+        with span("history.download", code=code, window=window) as d:
+            df = self._download_history(code, start.strftime("%Y%m%d"), date.today().strftime("%Y%m%d"))
+            if df is not None:
+                d.set(rows=len(df), bytes=int(df.memory_usage(index=False).sum()))
+        return df
+
+    def _rebuild_history(self, code: str) -> pd.DataFrame:
+        # About 244 sessions a year: twice the bar count in calendar days
+        # covers HISTORY_STORE_DAYS with room for holidays.
+        start = date.today() - timedelta(days=HISTORY_STORE_DAYS * 2)
+        df = self._download_window(code, start, "full")
+        if df is None or df.empty:
+            raise UpstreamEmptyError(f"{code} 未获取到历史数据。")
+        with span("history.normalize", code=code):
+            return self._normalize_history(code, df)
+
+    def _update_history(self, code: str, hist_cache: pd.DataFrame) -> pd.DataFrame | None:
+        # qfq prices are rescaled on every ex-dividend/split date, so new bars
+        # can only be appended to a cache whose recent closes still match what
+        # akshare returns now. Downloads a short window overlapping the cache;
+        # returns None when a full rebuild is needed.
+        with self._memo_lock:
+            if code in self._adjusted:
+                return None
+        if len(hist_cache) < MIN_HISTORY_BARS:
+            return None
+        if len(hist_cache) == HISTORY_LOOKBACK_DAYS:
+            # Cut to the daily lookback before the cache kept HISTORY_STORE_DAYS
+            # bars (or a listing exactly that old): rebuild once at full depth
+            # so weekly/monthly bars see the whole window.
+            return None
+        base = hist_cache
+        last_bar = _last_bar_date(base)
+        fetched_at = self.store.fetched_at(code)
+        if (
+            last_bar is not None
+            and fetched_at is not None
+            and fetched_at < self.calendar.session_ready_at(last_bar).timestamp()
+        ):
+            # The last bar was provisional (intraday); the download replaces it.
+            base = base.iloc[:-1]
+            last_bar = _last_bar_date(base)
+        if last_bar is None:
+            return None
+
+        df = self._download_window(code, last_bar - timedelta(days=ADJUST_OVERLAP_DAYS), "overlap")
+        if df is None or df.empty:
+            # Nothing traded since (suspension): the cache is as current as it gets.
+            return base.reset_index(drop=True)
+        with span("history.normalize", code=code):
+            recent = self._normalize_frame(code, df)
+        first_bar = str(base["date"].iloc[0])[:10]
+        overlap = recent[(recent["date"] >= first_bar) & (recent["date"] <= last_bar.isoformat())]
+        if overlap.empty:
+            return None
+        with span("history.overlap_check", code=code, bars=len(overlap)) as check:
+            cached_close = pd.to_numeric(base["close"], errors="coerce")
+            cached_close.index = base["date"].astype(str).str[:10]
+            expected = cached_close.reindex(overlap["date"].to_numpy())
+            drift = pd.Series(expected.to_numpy() - overlap["close"].to_numpy()).abs()
+            # A date missing from the cache (NaN drift) also forces a rebuild.
+            adjusted = not (drift <= ADJUST_PRICE_TOLERANCE).all()
+            check.set(adjusted=adjusted, max_drift=round(float(drift.max()), 4))
+        if adjusted:
+            return None
+        fresh = recent[recent["date"] > last_bar.isoformat()]
+        merged = pd.concat([base, fresh], ignore_index=True)
+        return merged.tail(HISTORY_STORE_DAYS).reset_index(drop=True)
+
+    def _download_history(self, code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        ak = _import_akshare()
+        return _call_with_retry(
             lambda: ak.stock_zh_a_hist(
                 symbol=code,
                 period="daily",
                 start_date=start_date,
                 end_date=end_date,
                 adjust="qfq",
-            )
+            ),
+            label="stock_zh_a_hist",
         )
-        if df is None or df.empty:
-            raise DataProviderError(f"{code} 未获取到历史数据。")
 
+    def _normalize_frame(self, code: str, df: pd.DataFrame) -> pd.DataFrame:
         rename_map = {
             "日期": "date",
             "开盘": "open",
@@ -307,21 +790,169 @@ class AKShareProvider:
         required = ["date", "open", "high", "low", "close", "volume"]
         for col in required:
             if col not in hist.columns:
-                raise DataProviderError(f"{code} 历史数据缺少字段: {col}")
+                raise SchemaDriftError(f"{code} 历史数据缺少字段: {col}")
+        hist["date"] = pd.to_datetime(hist["date"], errors="coerce").dt.strftime("%Y-%m-%d")
         hist["close"] = pd.to_numeric(hist["close"], errors="coerce")
-        hist = hist.dropna(subset=["close"])
-        hist = hist[hist["close"] > 0]
+        hist = hist.dropna(subset=["date", "close"])
+        return hist[hist["close"] > 0]
+
+    def _normalize_history(self, code: str, df: pd.DataFrame) -> pd.DataFrame:
+        hist = self._normalize_frame(code, df)
         if len(hist) < MIN_HISTORY_BARS:
             raise DataProviderError(
                 f"{code} 有效历史数据不足（{len(hist)} < {MIN_HISTORY_BARS}）。"
             )
-        hist = hist.tail(HISTORY_LOOKBACK_DAYS).reset_index(drop=True)
-        hist.to_csv(cache_path, index=False, encoding="utf-8")
-        return hist
+        return hist.tail(HISTORY_STORE_DAYS).reset_index(drop=True)
 
-    def get_history_safe(self, symbol: str) -> Tuple[pd.DataFrame | None, str | None, str | None]:
+    def _spot_bars(self) -> Tuple[float, date, Dict[str, Dict[str, float]]]:
+        spot = self._fetch_spot_dataframe()
+        with self._memo_lock:
+            fetched_at = self._spot_memo[0] if self._spot_memo is not None else time.time()
+        code_col = _pick_first_existing(spot, ["代码", "symbol"])
+        columns = {bar: col for bar, col in SPOT_BAR_COLUMNS.items() if col in spot.columns}
+        for bar in ("high", "low", "close"):
+            if bar not in columns:
+                raise SchemaDriftError(f"行情快照缺少字段: {SPOT_BAR_COLUMNS[bar]}")
+        quotes = pd.DataFrame(
+            {bar: pd.to_numeric(spot[col], errors="coerce") for bar, col in columns.items()}
+        )
+        quotes.index = spot[code_col].astype(str).str.extract(r"(\d{6})", expand=False)
+        if "昨收" in spot.columns:
+            quotes["prev_close"] = pd.to_numeric(spot["昨收"], errors="coerce").to_numpy()
+        if spot.attrs.get(SPOT_VOLUME_IN_SHARES) and "volume" in quotes.columns:
+            quotes["volume"] = quotes["volume"] / 100.0
+        # Suspended or not yet traded: no usable price for today's bar.
+        quotes = quotes[quotes.index.notna() & (quotes["close"] > 0)]
+        if "volume" in quotes.columns:
+            quotes = quotes[quotes["volume"].fillna(0) > 0]
+        quotes = quotes[~quotes.index.duplicated()]
+        bars = quotes.to_dict(orient="index")
+        return fetched_at, self.calendar.snapshot_session(fetched_at), bars
+
+    def _patch_latest_bar(
+        self,
+        code: str,
+        session: date,
+        quote: Dict[str, float],
+    ) -> str:
+        hist = self.store.load(code)
+        if hist is None or len(hist) < MIN_HISTORY_BARS:
+            return BAR_SKIPPED
+        last_bar = _last_bar_date(hist)
+        if last_bar is None or last_bar > session:
+            return BAR_SKIPPED
+        values = {col: value for col, value in quote.items() if col in hist.columns and pd.notna(value)}
+        last = hist.iloc[-1].to_dict()
+        previous = self.calendar.previous_session(session)
+        if last_bar == previous and not self._is_history_current_for(code, last_bar):
+            # Only a history complete up to the previous session can be
+            # extended. A provisional (intraday-patched) previous bar is also
+            # expected to differ from the snapshot's 昨收, so it says nothing
+            # about an adjustment; the overlap download settles both.
+            return BAR_SKIPPED
+        if self._spot_shows_adjustment(hist, session, quote.get("prev_close")):
+            with self._memo_lock:
+                self._adjusted.add(code)
+            return BAR_ADJUSTED
+        if last_bar == session:
+            if all(last[col] == value for col, value in values.items()):
+                return BAR_UNCHANGED
+            row = {**last, **values}
+            patched = pd.concat([hist.iloc[:-1], pd.DataFrame([row])], ignore_index=True)
+            status = BAR_PATCHED
+        elif last_bar == previous:
+            row = {col: last[col] if col == "股票代码" else float("nan") for col in hist.columns}
+            row.update(values)
+            row["date"] = session.isoformat()
+            if pd.isna(row.get("open")):
+                row["open"] = row["close"]
+            patched = pd.concat([hist, pd.DataFrame([row])], ignore_index=True)
+            patched = patched.tail(HISTORY_STORE_DAYS).reset_index(drop=True)
+            status = BAR_APPENDED
+        else:
+            return BAR_SKIPPED
+        self.store.save(code, patched)
+        return status
+
+    def _spot_shows_adjustment(self, hist: pd.DataFrame, session: date, prev_close: object) -> bool:
+        # On an ex-date the snapshot's previous close is the exchange's
+        # adjusted reference price, so it no longer matches the cached close
+        # of the previous session.
+        if prev_close is None or pd.isna(prev_close):
+            return False
+        previous = self.calendar.previous_session(session)
+        dates = hist["date"].astype(str).str[:10]
+        match = hist.loc[dates == previous.isoformat(), "close"]
+        if match.empty:
+            return False
+        cached = pd.to_numeric(match, errors="coerce").iloc[-1]
+        return bool(pd.notna(cached) and abs(float(cached) - float(prev_close)) > ADJUST_PRICE_TOLERANCE)
+
+    def _is_history_current_for(self, code: str, last_bar: date) -> bool:
+        # The previous-session bar must be final before a new bar goes on top.
+        fetched_at = self.store.fetched_at(code)
+        if fetched_at is None:
+            return True
+        return fetched_at >= self.calendar.session_ready_at(last_bar).timestamp()
+
+    def refresh_from_spot(self, codes: Iterable[str] | None = None) -> Dict[str, str]:
+        # Brings cached histories up to date from one spot snapshot instead of
+        # one stock_zh_a_hist call per symbol: the snapshot session's bar is
+        # patched in place, or appended when the history ends at the session
+        # before. `codes` defaults to every cached history.
+        if codes is None:
+            targets = sorted(p.stem[len("hist_"):] for p in self.cache_dir.glob("hist_*.csv"))
+        else:
+            targets = []
+            for code in codes:
+                try:
+                    targets.append(normalize_symbol(code))
+                except ValueError:
+                    continue
+        with span("history.spot_refresh", requested=len(targets)) as s:
+            fetched_at, session, bars = self._spot_bars()
+            statuses: Dict[str, str] = {}
+            for code in targets:
+                with self._memo_lock:
+                    done = self._spot_patched.get(code) == fetched_at
+                quote = bars.get(code)
+                if done or quote is None:
+                    statuses[code] = BAR_UNCHANGED if done else BAR_SKIPPED
+                    continue
+                statuses[code] = self._patch_latest_bar(code, session, quote)
+                if statuses[code] in (BAR_PATCHED, BAR_APPENDED, BAR_UNCHANGED):
+                    with self._memo_lock:
+                        self._spot_patched[code] = fetched_at
+            s.set(
+                session=session.isoformat(),
+                patched=sum(1 for v in statuses.values() if v == BAR_PATCHED),
+                appended=sum(1 for v in statuses.values() if v == BAR_APPENDED),
+                adjusted=sum(1 for v in statuses.values() if v == BAR_ADJUSTED),
+            )
+        return statuses
+
+    def get_bars(self, symbol: str, period: str = DAILY) -> pd.DataFrame:
+        # Weekly/monthly bars are resampled from the whole daily cache
+        # (HISTORY_STORE_DAYS, not just the daily lookback) instead of being
+        # downloaded, and are memoized next to it in the store.
+        code = normalize_symbol(symbol)
+        hist = self.get_history(code)
+        if period == DAILY:
+            return hist
+        with span("history.resample", code=code, period=period) as s:
+            bars = self.store.view(code, period, lambda daily: resample_bars(daily, period))
+            if bars is None:
+                bars = resample_bars(hist, period)
+            s.set(rows=len(bars))
+        return bars
+
+    def get_history_safe(
+        self,
+        symbol: str,
+        period: str = DAILY,
+    ) -> Tuple[pd.DataFrame | None, str | None, str | None]:
         try:
-            hist = self.get_history(symbol)
+            hist = self.get_bars(symbol, period)
             return hist, None, None
         except Exception as exc:
             return None, classify_error(exc), str(exc)
@@ -1,44 +1,54 @@
 from __future__ import annotations
 
 import os
-import re
 import sys
 import time
+import uuid
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
-import pandas as pd
 import streamlit as st
 
+SCRIPT_STARTED = time.perf_counter()
+
 # Ensure imports work even when streamlit is launched outside project root.
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from lite_tool.akshare_provider import AKShareProvider, Candidate, DataProviderError
 from lite_tool.config import (
-    AUTO_FILL_POOL_SIZE,
-    AUTO_FILL_TARGET,
+    CACHE_SERVER_ENV,
     DISCLAIMER,
     FACTOR_HELP_TEXT,
+    JOB_POLL_SECONDS,
     MAX_DAILY_RUNS,
     MAX_UNIVERSE_SIZE,
     METRIC_HELP_TEXT,
     MIN_SUCCESS_TO_CHARGE,
     PRODUCT_NAME,
+    RESULT_EXPORT_ENABLED,
     RUNTIME_BUDGET_SECONDS,
     SIGNAL_DISPLAY_MAP,
     XHS_NOTES_URL,
 )
-from lite_tool.limits import consume_run, runs_remaining
-from lite_tool.licensing import (
-    LicenseError,
-    get_machine_code,
-    resolve_license_path,
-    resolve_public_key_path,
-    verify_license_file,
+from lite_tool.limits import runs_remaining
+from lite_tool.licensing import check_license_cached, get_machine_code
+from lite_tool.profiling import (
+    profile_enabled,
+    record_startup_mark,
+    recorded_imports,
+    seconds_since_start,
+    timed_import,
 )
-from lite_tool.scoring import evaluate_candidate
+from lite_tool.tracing import span
+from lite_tool.watchlist import WatchlistStore
+
+# pandas, akshare and the pipeline are imported on first use (a run being
+# submitted or attached) so the header and license gate paint without them.
+if TYPE_CHECKING:
+    from lite_tool.akshare_provider import AKShareProvider
+    from lite_tool.jobs import Job, JobRunner
+    from lite_tool.pipeline import RunSummary
 
 
 st.set_page_config(page_title=PRODUCT_NAME, layout="wide")
@@ -94,9 +104,11 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-provider = AKShareProvider()
 MANUAL_UNIVERSE_LABEL = "我自己填股票代码"
+NO_WATCHLIST_LABEL = "（不使用）"
+DEFAULT_MANUAL_CODES = "600519 000858 600036 000333 601318 000001"
 AUTO_UNIVERSE_LABEL = "系统帮我选（热门成交股票）"
+SYMBOL_STATUS_LABELS = {"loading": "获取中", "scored": "已评分", "failed": "跳过"}
 
 
 def require_license_enabled() -> bool:
@@ -105,251 +117,107 @@ def require_license_enabled() -> bool:
 
 def render_license_gate() -> None:
     machine_code = get_machine_code()
-    key_path = resolve_public_key_path()
-    lic_path = resolve_license_path()
+    check = check_license_cached(machine_code)
 
     st.subheader("授权验证")
     st.caption(f"设备码：`{machine_code}`")
 
-    if key_path is None:
+    if check.public_key_path is None:
         st.error("未找到 public_key.pem，无法校验授权。")
         st.stop()
-    if lic_path is None:
+    if check.license_path is None:
         st.error("未找到 license.key。请联系服务方获取授权文件后重试。")
         st.stop()
-
-    try:
-        lic = verify_license_file(lic_path, key_path, machine_code=machine_code)
-    except LicenseError as exc:
-        st.error(f"授权校验失败：{exc}")
+    if check.info is None:
+        st.error(f"授权校验失败：{check.error}")
         st.stop()
 
+    lic = check.info
     st.success(f"授权有效：{lic.license_id}（到期日 {lic.expires_at}）")
 
 
-def parse_codes(raw_text: str) -> List[str]:
-    items = re.split(r"[\s,，;；]+", raw_text.strip())
-    codes = []
-    for item in items:
-        if not item:
-            continue
-        code = item.upper().replace(".SH", "").replace(".SZ", "")
-        if code.isdigit() and len(code) == 6:
-            codes.append(code)
-    deduped = []
-    seen = set()
-    for code in codes:
-        if code not in seen:
-            seen.add(code)
-            deduped.append(code)
-    return deduped
-
-
 def display_signal(raw_signal: str) -> str:
     return SIGNAL_DISPLAY_MAP.get(raw_signal, raw_signal)
 
 
-@st.cache_data(ttl=900, show_spinner=False)
-def cached_auto_candidates(limit: int) -> List[Candidate]:
-    return provider.get_auto_candidates(limit=limit)
-
-
-@st.cache_data(ttl=3600, show_spinner=False)
-def cached_history(code: str) -> pd.DataFrame:
-    return provider.get_history(symbol=code)
-
-
-st.title(PRODUCT_NAME)
-st.caption("免费体验版：仅1个战法（巴菲特）| 每天最多3次运行 | 仅显示前3只候选")
-st.warning(DISCLAIMER, icon="⚠️")
-st.info("官方声明：Lite 体验版长期免费（0元）。请勿购买该免费安装包。", icon="ℹ️")
-
-if require_license_enabled():
-    render_license_gate()
-else:
-    st.caption(f"当前为开放试用模式（未启用授权校验）。设备码：`{get_machine_code()}`")
-
-remaining = runs_remaining()
-st.metric("今日剩余运行次数", f"{remaining}/{MAX_DAILY_RUNS}")
-debug_mode = st.toggle("调试模式（显示原始报错）", value=False)
-
-if remaining <= 0:
-    st.error("今天的免费运行次数已用完。明天会自动恢复3次。")
-    st.stop()
-
-universe_mode = st.radio(
-    "候选池来源",
-    options=[MANUAL_UNIVERSE_LABEL, AUTO_UNIVERSE_LABEL],
-    index=1,
-    horizontal=True,
-)
-if universe_mode == AUTO_UNIVERSE_LABEL:
-    st.caption("系统会先从当日成交活跃的股票里选一批，再帮你做体检。")
-else:
-    st.caption("只评估你输入的股票代码，更适合有明确关注名单的情况。")
-
-with st.form("lite_form"):
-    input_codes = ""
-    auto_limit = 20
-    if universe_mode == MANUAL_UNIVERSE_LABEL:
-        input_codes = st.text_area(
-            "输入股票代码（最多30只，逗号/空格分隔）",
-            value="600519 000858 600036 000333 601318 000001",
-            help="示例：600519, 000858, 600036",
-        )
-    else:
-        auto_limit = st.slider(
-            "系统自动选股数量（免费版上限30只）",
-            min_value=10,
-            max_value=MAX_UNIVERSE_SIZE,
-            value=20,
-            step=5,
-        )
-    submitted = st.form_submit_button("运行 Lite 体检（消耗1次）", type="primary")
-    st.caption("点击后会进入处理中（约30-60秒），请勿重复点击。")
-
-
-if submitted:
-    run_status = st.status("正在处理，请勿重复点击", expanded=True)
-    run_status.write("步骤1/3：准备候选池")
-
-    started_at = time.time()
-    budget_exhausted = False
-    candidates: List[Candidate] = []
-    errors: List[str] = []
-    attempted_codes = set()
-    network_fail_count = 0
-    data_fail_count = 0
-
-    if universe_mode == MANUAL_UNIVERSE_LABEL:
-        codes = parse_codes(input_codes)
-        if not codes:
-            run_status.update(label="处理失败", state="error", expanded=True)
-            st.error("请至少输入1个合法A股代码（6位数字）。")
-            st.stop()
-        if len(codes) > MAX_UNIVERSE_SIZE:
-            st.info(f"免费版最多评估{MAX_UNIVERSE_SIZE}只，已自动截断。")
-            codes = codes[:MAX_UNIVERSE_SIZE]
-        name_map: Dict[str, str] = {}
-        try:
-            name_map = provider.resolve_names(codes)
-        except Exception:  # pragma: no cover
-            name_map = {}
-        unresolved = [code for code in codes if code not in name_map]
-        if unresolved:
-            st.info(
-                f"有 {len(unresolved)} 只股票名称暂未解析，已用代码展示，不影响体检结果。"
-            )
-        candidates = [Candidate(code=c, name=name_map.get(c, c)) for c in codes]
-    else:
-        try:
-            with st.spinner("正在获取热门候选股票，首次可能需要30-60秒，请稍等..."):
-                candidates = cached_auto_candidates(limit=auto_limit)
-        except DataProviderError:
-            run_status.update(label="处理失败", state="error", expanded=True)
-            st.error("暂时没拿到自动候选池数据，请稍后重试。")
-            st.stop()
-        except Exception:  # pragma: no cover
-            run_status.update(label="处理失败", state="error", expanded=True)
-            st.error("自动候选池加载失败，请稍后重试。")
-            st.stop()
-
-    if not candidates:
-        run_status.update(label="处理失败", state="error", expanded=True)
-        st.error("本次未获得可用候选池，请稍后重试。")
-        st.stop()
-
-    st.write(f"本次候选池数量：{len(candidates)}")
-    run_status.write("步骤2/3：计算体检结果")
-    progress = st.progress(0)
-    results = []
-
-    processed_count = 0
-    expected_count = len(candidates)
-    for cand in candidates:
-        if time.time() - started_at > RUNTIME_BUDGET_SECONDS:
-            budget_exhausted = True
-            break
-        processed_count += 1
-        attempted_codes.add(cand.code)
-        hist, err_type, err_text = provider.get_history_safe(cand.code)
-        if hist is None:
-            if err_type == "network":
-                network_fail_count += 1
-            else:
-                data_fail_count += 1
-            errors.append(f"{cand.code} 失败: {err_text}")
-            progress.progress(min(processed_count / max(expected_count, 1), 1.0))
-            continue
-        try:
-            result = evaluate_candidate(cand.code, cand.name, hist)
-            results.append(result.to_dict())
-        except Exception as exc:
-            data_fail_count += 1
-            errors.append(f"{cand.code} 评分失败: {exc}")
-        progress.progress(min(processed_count / max(expected_count, 1), 1.0))
-
-    if (
-        universe_mode == MANUAL_UNIVERSE_LABEL
-        and len(results) < AUTO_FILL_TARGET
-        and not budget_exhausted
-    ):
-        run_status.write("步骤2/3：自选结果不足3只，正在自动补位")
-        try:
-            supplement_pool = cached_auto_candidates(limit=min(MAX_UNIVERSE_SIZE, AUTO_FILL_POOL_SIZE))
-        except Exception:
-            supplement_pool = []
-        supplement_candidates = [c for c in supplement_pool if c.code not in attempted_codes]
-        needed = AUTO_FILL_TARGET - len(results)
-        expected_count += min(len(supplement_candidates), max(needed, 0))
-        for cand in supplement_candidates:
-            if needed <= 0:
-                break
-            if time.time() - started_at > RUNTIME_BUDGET_SECONDS:
-                budget_exhausted = True
-                break
-            processed_count += 1
-            attempted_codes.add(cand.code)
-            hist, err_type, err_text = provider.get_history_safe(cand.code)
-            if hist is None:
-                if err_type == "network":
-                    network_fail_count += 1
-                else:
-                    data_fail_count += 1
-                errors.append(f"{cand.code} 补位失败: {err_text}")
-                progress.progress(min(processed_count / max(expected_count, 1), 1.0))
-                continue
-            try:
-                result = evaluate_candidate(cand.code, cand.name, hist)
-                results.append(result.to_dict())
-                needed -= 1
-            except Exception as exc:
-                data_fail_count += 1
-                errors.append(f"{cand.code} 补位评分失败: {exc}")
-            progress.progress(min(processed_count / max(expected_count, 1), 1.0))
-
-    if not results:
-        run_status.update(label="处理失败", state="error", expanded=True)
-        st.error("本次未生成有效结果，请稍后重试。")
-        if errors:
-            st.info("本次数据源波动较大，建议稍后重试。")
-            if debug_mode:
-                st.code("\n".join(errors[:12]))
-        st.stop()
+@st.cache_resource(show_spinner=False)
+def get_provider() -> AKShareProvider:
+    # Shared by every session: the spot snapshot, name maps and the history
+    # store live once per process instead of once per session/rerun.
+    with timed_import("lite_tool.akshare_provider"):
+        from lite_tool.akshare_provider import AKShareProvider
+    if os.environ.get(CACHE_SERVER_ENV):
+        # Replicas on one host share the cache daemon's store instead.
+        from lite_tool.cache_client import provider_from_env
+
+        return provider_from_env()
+    return AKShareProvider()
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner() -> JobRunner:
+    # One runner per server process: jobs survive reruns, refreshes and
+    # reconnects, and the script thread only polls for events.
+    with timed_import("lite_tool.jobs"):
+        from lite_tool.jobs import JobRunner
+    provider = get_provider()
+    run_cache = None
+    if os.environ.get(CACHE_SERVER_ENV):
+        from lite_tool.cache_client import run_cache_for
+
+        run_cache = run_cache_for(provider)
+    return JobRunner(provider, run_cache=run_cache)
+
+
+def session_token() -> str:
+    # Identifies this browser tab across reruns and reloads (kept in the URL
+    # next to ?job=), so a shared job's charge is only shown to its owner.
+    token = st.session_state.get("session_token") or st.query_params.get("sid") or uuid.uuid4().hex[:12]
+    st.session_state["session_token"] = token
+    return token
+
+
+def attached_job() -> Job | None:
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if not job_id:
+        return None
+    return get_job_runner().get(job_id)
+
+
+def render_startup_profile(marks: List[Tuple[str, float]]) -> None:
+    with st.expander("启动耗时分析（LITE_PROFILE_STARTUP）", expanded=False):
+        st.caption(f"进程启动至今 {seconds_since_start():.2f} 秒")
+        for label, seconds in marks:
+            st.write(f"{label}：{seconds * 1000:.0f} ms")
+        imports = recorded_imports()
+        if imports:
+            st.markdown("**延迟加载模块（首次导入耗时）**")
+            for name, seconds in imports:
+                st.write(f"`{name}`：{seconds * 1000:.0f} ms")
+
+
+def render_stage_timings(summary: RunSummary) -> None:
+    import pandas as pd
+
+    if not summary.stage_timings:
+        return
+    st.markdown("#### 分阶段耗时")
+    table = pd.DataFrame(summary.stage_timings).rename(
+        columns={
+            "stage": "阶段",
+            "count": "次数",
+            "total_ms": "总耗时(ms)",
+            "max_ms": "最长单次(ms)",
+            "cache_hits": "缓存命中",
+        }
+    ).fillna("")
+    st.dataframe(table, use_container_width=True, hide_index=True)
 
-    success_count = len(results)
-    failed_count = len(errors)
-    attempted_count = success_count + failed_count
 
-    charged = success_count >= MIN_SUCCESS_TO_CHARGE
-    if charged:
-        consume_run()
-    else:
-        st.warning(
-            f"本次仅成功 {success_count} 只，未达到{MIN_SUCCESS_TO_CHARGE}只，不扣次数。可稍后重试。"
-        )
+def render_results(summary: RunSummary, debug_mode: bool, charged: bool) -> None:
+    import pandas as pd
 
-    df = pd.DataFrame(results).sort_values("score", ascending=False).reset_index(drop=True)
+    df = pd.DataFrame(summary.results).sort_values("score", ascending=False).reset_index(drop=True)
     top3 = df.head(3).copy()
     top3["signal_display"] = top3["signal"].map(display_signal)
 
@@ -396,9 +264,9 @@ if submitted:
     st.dataframe(simple_display, use_container_width=True, hide_index=True)
 
     s1, s2, s3 = st.columns(3)
-    s1.metric("尝试评估", attempted_count)
-    s2.metric("成功", success_count)
-    s3.metric("跳过", failed_count)
+    s1.metric("尝试评估", summary.attempted_count)
+    s2.metric("成功", summary.success_count)
+    s3.metric("跳过", summary.failed_count)
 
     st.subheader("一句话解释")
     st.success(f"当前最优候选：{best['name']}（{best_signal}，{best['risk_tag']}）")
@@ -432,20 +300,289 @@ if submitted:
 
         st.markdown("#### 本次处理摘要")
         st.caption(
-            f"网络问题跳过 {network_fail_count} 只，数据问题跳过 {data_fail_count} 只。"
+            f"网络问题跳过 {summary.network_fail_count} 只，数据问题跳过 {summary.data_fail_count} 只。"
         )
-        if budget_exhausted:
+        if summary.budget_exhausted:
             st.warning(f"已触发 {RUNTIME_BUDGET_SECONDS} 秒处理预算，提前结束本次运行。")
-        if debug_mode and errors:
-            st.code("\n".join(errors[:12]))
+        if summary.stopped_early:
+            st.caption(
+                f"Top 3 已稳定，提前结束；本次评估了 {summary.attempted_count}/{summary.candidate_count} 只候选。"
+            )
+        if debug_mode and summary.errors:
+            st.code("\n".join(summary.errors[:12]))
+        if debug_mode:
+            render_stage_timings(summary)
 
-    if errors:
-        st.info(f"有 {len(errors)} 只股票因数据问题跳过，不影响 Top 3 结果。")
+    if summary.errors:
+        st.info(f"有 {len(summary.errors)} 只股票因数据问题跳过，不影响 Top 3 结果。")
         if not debug_mode:
             st.caption("为保证页面易读，技术报错已默认隐藏。")
 
+
+def render_live_results(
+    slot,
+    results: List[Dict[str, object]],
+    symbol_status: Dict[str, Tuple[str, str]],
+) -> None:
+    import pandas as pd
+
+    with slot.container():
+        if results:
+            leaders = sorted(results, key=lambda r: float(r["score"]), reverse=True)[:3]
+            best = leaders[0]
+            st.markdown("#### 实时 Top 3（处理中，随结果更新）")
+            live_top3 = pd.DataFrame(
+                [
+                    {
+                        "代码": r["code"],
+                        "名称": r["name"],
+                        "总分": r["score"],
+                        "结论": display_signal(str(r["signal"])),
+                        "风险标签": r["risk_tag"],
+                    }
+                    for r in leaders
+                ]
+            )
+            st.dataframe(live_top3, use_container_width=True, hide_index=True)
+            m1, m2, m3 = st.columns(3)
+            m1.metric(f"{best['name']} 近60日涨跌(%)", f"{best['return_60d']}")
+            m2.metric("年化波动(%)", f"{best['annual_volatility']}")
+            m3.metric("最大回撤(%)", f"{best['max_drawdown']}")
+        if symbol_status:
+            status_rows = [
+                {"代码": code, "名称": name, "状态": SYMBOL_STATUS_LABELS.get(status, status)}
+                for code, (name, status) in symbol_status.items()
+            ]
+            st.dataframe(pd.DataFrame(status_rows), use_container_width=True, hide_index=True)
+
+
+def export_bytes(job: Job, fmt: str) -> bytes | None:
+    import tempfile
+
+    from lite_tool.export import export_results
+
+    summary = job.summary
+    meta = {
+        "job_id": job.job_id,
+        "request": job.request.key(),
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job.created_at)),
+        "candidate_count": summary.candidate_count,
+        "success_count": summary.success_count,
+        "failed_count": summary.failed_count,
+        "budget_exhausted": summary.budget_exhausted,
+        "stopped_early": summary.stopped_early,
+    }
+    with tempfile.TemporaryDirectory(prefix="lite_export_") as tmp:
+        out_path = Path(tmp) / f"ranking.{fmt}"
+        try:
+            export_results(summary.results, out_path, fmt, meta)
+        except RuntimeError:
+            return None
+        return out_path.read_bytes()
+
+
+def render_export(job: Job) -> None:
+    # Only in builds with RESULT_EXPORT_ENABLED: the free tier lists export
+    # as a full-version feature.
+    st.markdown("#### 导出完整排名")
+    st.caption(f"包含本次全部 {job.summary.success_count} 只成功评估的股票及运行信息。")
+    c1, c2 = st.columns(2)
+    csv_data = export_bytes(job, "csv")
+    if csv_data is not None:
+        c1.download_button("下载 CSV", csv_data, file_name=f"ranking_{job.job_id}.csv", mime="text/csv")
+    xlsx_data = export_bytes(job, "xlsx")
+    if xlsx_data is not None:
+        c2.download_button(
+            "下载 Excel",
+            xlsx_data,
+            file_name=f"ranking_{job.job_id}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    else:
+        c2.caption("Excel 导出需要安装 openpyxl。")
+
+
+def render_job(job: Job, debug_mode: bool) -> None:
+    from lite_tool.jobs import JOB_FAILED
+
+    run_status = st.status("正在处理，请勿重复点击", expanded=True)
+    count_slot = st.empty()
+    notices = st.container()
+    progress = st.progress(0)
+    live_slot = st.empty()
+
+    cursor = 0
+    live_results: List[Dict[str, object]] = []
+    symbol_status: Dict[str, Tuple[str, str]] = {}
+    with span("app.poll", job=job.job_id) as poll_span:
+        render_count = 0
+        while True:
+            finished = job.finished
+            events, cursor = job.read(cursor, timeout=JOB_POLL_SECONDS)
+            for event in events:
+                if event.kind == "stage":
+                    run_status.write(event.message)
+                elif event.kind == "notice":
+                    notices.info(event.message)
+                elif event.kind == "candidates":
+                    count_slot.write(f"本次候选池数量：{event.data['count']}")
+                elif event.kind == "progress":
+                    processed = int(event.data["processed"])
+                    expected = int(event.data["expected"])
+                    progress.progress(min(processed / max(expected, 1), 1.0))
+                elif event.kind == "symbol":
+                    symbol_status[str(event.data["code"])] = (
+                        str(event.data["name"]),
+                        str(event.data["status"]),
+                    )
+                elif event.kind == "result":
+                    live_results.append(event.data)
+            if finished:
+                break
+            if events:
+                render_live_results(live_slot, live_results, symbol_status)
+                render_count += 1
+        poll_span.set(events=cursor, renders=render_count)
+
+    # The final report below replaces the live view.
+    live_slot.empty()
+
+    if job.status == JOB_FAILED or job.summary is None:
+        run_status.update(label="处理失败", state="error", expanded=True)
+        st.error(job.error or "处理失败，请稍后重试。")
+        return
+
+    summary = job.summary
+    if not summary.results:
+        run_status.update(label="处理失败", state="error", expanded=True)
+        st.error("本次未生成有效结果，请稍后重试。")
+        if summary.errors:
+            st.info("本次数据源波动较大，建议稍后重试。")
+            if debug_mode:
+                st.code("\n".join(summary.errors[:12]))
+        if debug_mode:
+            render_stage_timings(summary)
+        return
+
+    if not summary.charged:
+        st.warning(
+            f"本次仅成功 {summary.success_count} 只，未达到{MIN_SUCCESS_TO_CHARGE}只，不扣次数。可稍后重试。"
+        )
+
+    render_results(summary, debug_mode, job.charged_to(session_token()))
+
     run_status.write("步骤3/3：结果已生成")
     run_status.update(label="处理完成", state="complete", expanded=False)
 
     st.markdown("---")
-    st.caption("完整版可解锁：完整榜单、结果导出、7天答疑与30天更新。")
+    if RESULT_EXPORT_ENABLED:
+        render_export(job)
+    else:
+        st.caption("完整版可解锁：完整榜单、结果导出、7天答疑与30天更新。")
+
+
+st.title(PRODUCT_NAME)
+st.caption("免费体验版：仅1个战法（巴菲特）| 每天最多3次运行 | 仅显示前3只候选")
+st.warning(DISCLAIMER, icon="⚠️")
+st.info("官方声明：Lite 体验版长期免费（0元）。请勿购买该免费安装包。", icon="ℹ️")
+
+if require_license_enabled():
+    render_license_gate()
+else:
+    st.caption(f"当前为开放试用模式（未启用授权校验）。设备码：`{get_machine_code()}`")
+
+startup_marks: List[Tuple[str, float]] = [("页头与授权区", time.perf_counter() - SCRIPT_STARTED)]
+active_job = attached_job()
+
+remaining = runs_remaining()
+st.metric("今日剩余运行次数", f"{remaining}/{MAX_DAILY_RUNS}")
+debug_mode = st.toggle("调试模式（显示原始报错）", value=False)
+
+if remaining <= 0:
+    st.error("今天的免费运行次数已用完。明天会自动恢复3次。")
+    if active_job is not None:
+        render_job(active_job, debug_mode)
+    st.stop()
+
+universe_mode = st.radio(
+    "候选池来源",
+    options=[MANUAL_UNIVERSE_LABEL, AUTO_UNIVERSE_LABEL],
+    index=1,
+    horizontal=True,
+)
+if universe_mode == AUTO_UNIVERSE_LABEL:
+    st.caption("系统会先从当日成交活跃的股票里选一批，再帮你做体检。")
+else:
+    st.caption("只评估你输入的股票代码，更适合有明确关注名单的情况。")
+
+watchlists = WatchlistStore()
+chosen_watchlist = ""
+if universe_mode == MANUAL_UNIVERSE_LABEL:
+    saved_watchlists = watchlists.names()
+    if saved_watchlists:
+        picked = st.selectbox("载入已保存的自选名单", options=[NO_WATCHLIST_LABEL, *saved_watchlists])
+        chosen_watchlist = "" if picked == NO_WATCHLIST_LABEL else picked
+
+with st.form("lite_form"):
+    input_codes = ""
+    save_as = ""
+    auto_limit = 20
+    if universe_mode == MANUAL_UNIVERSE_LABEL:
+        input_codes = st.text_area(
+            "输入股票代码（最多30只，逗号/空格分隔）",
+            value=" ".join(watchlists.get(chosen_watchlist)) if chosen_watchlist else DEFAULT_MANUAL_CODES,
+            help="示例：600519, 000858, 600036",
+        )
+        save_as = st.text_input(
+            "保存为自选名单（可选）",
+            value=chosen_watchlist,
+            help="填写名称后，运行时会保存这组代码，下次直接载入。",
+        )
+    else:
+        auto_limit = st.slider(
+            "系统自动选股数量（免费版上限30只）",
+            min_value=10,
+            max_value=MAX_UNIVERSE_SIZE,
+            value=20,
+            step=5,
+        )
+    early_stop = st.checkbox(
+        "Top 3 稳定后提前结束（更快看到结果）",
+        value=False,
+        help="成功评估满3只且前3名连续多只不再变化时，提前结束本次运行。",
+    )
+    submitted = st.form_submit_button("运行 Lite 体检（消耗1次）", type="primary")
+    st.caption("点击后会进入处理中（约30-60秒），请勿重复点击。")
+
+
+record_startup_mark("first_render")
+if profile_enabled():
+    startup_marks.append(("表单渲染完成", time.perf_counter() - SCRIPT_STARTED))
+    render_startup_profile(startup_marks)
+
+if submitted:
+    from lite_tool.pipeline import AUTO_MODE, MANUAL_MODE, RunRequest, parse_codes
+
+    if active_job is not None and not active_job.finished:
+        st.info("上一次运行仍在处理中，已为你继续显示该任务进度。")
+    else:
+        if universe_mode == MANUAL_UNIVERSE_LABEL:
+            codes = parse_codes(input_codes)
+            if not codes:
+                st.error("请至少输入1个合法A股代码（6位数字）。")
+                st.stop()
+            if save_as.strip():
+                watchlists.save(save_as, codes)
+            request = RunRequest(mode=MANUAL_MODE, codes=tuple(codes), early_stop=early_stop)
+        else:
+            request = RunRequest(mode=AUTO_MODE, auto_limit=auto_limit, early_stop=early_stop)
+        runner = get_job_runner()
+        owner = session_token()
+        job_id = runner.submit(request, owner=owner)
+        st.session_state["job_id"] = job_id
+        st.query_params["job"] = job_id
+        st.query_params["sid"] = owner
+        active_job = runner.get(job_id)
+
+if active_job is not None:
+    render_job(active_job, debug_mode)
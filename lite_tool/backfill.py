@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from lite_tool.akshare_provider import CACHE_HIT, DATA_ERROR, NETWORK_ERROR, AKShareProvider
+from lite_tool.config import (
+    BACKFILL_CHECKPOINT_SECONDS,
+    BACKFILL_PASS_PAUSE_SECONDS,
+    BACKFILL_PASSES,
+    BACKFILL_RATE_PER_SECOND,
+    BACKFILL_WORKERS,
+)
+from lite_tool.pipeline import parse_codes
+from lite_tool.tracing import bind
+
+
+UNIVERSE_LIMIT = 10000
+
+
+class RateLimiter:
+    # Spaces network calls evenly across all workers.
+    def __init__(self, per_second: float) -> None:
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BackfillState:
+    # The work queue and its progress, checkpointed as JSON so an interrupted
+    # run resumes where it stopped. `failed` holds the latest error per code;
+    # network failures are retried in later passes, data failures are final.
+    def __init__(self, path: Path, codes: List[str]) -> None:
+        self.path = path
+        self.codes = codes
+        self.done: Dict[str, float] = {}
+        self.failed: Dict[str, Dict[str, object]] = {}
+        self.passes = 0
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+
+    @classmethod
+    def load(cls, path: Path) -> "BackfillState | None":
+        if not path.exists():
+            return None
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        state = cls(path, list(raw.get("codes", [])))
+        state.done = dict(raw.get("done", {}))
+        state.failed = dict(raw.get("failed", {}))
+        state.passes = int(raw.get("passes", 0))
+        state.created_at = str(raw.get("created_at", state.created_at))
+        return state
+
+    def save(self) -> None:
+        payload = {
+            "created_at": self.created_at,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "passes": self.passes,
+            "codes": self.codes,
+            "done": self.done,
+            "failed": self.failed,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def pending(self, retry_data: bool = False) -> List[str]:
+        queue = []
+        for code in self.codes:
+            if code in self.done:
+                continue
+            failure = self.failed.get(code)
+            if failure is not None and failure.get("error_type") != NETWORK_ERROR and not retry_data:
+                continue
+            queue.append(code)
+        return queue
+
+    def mark(self, code: str, error_type: str | None, error: str | None) -> None:
+        if error_type is None:
+            self.done[code] = time.time()
+            self.failed.pop(code, None)
+            return
+        attempts = int(self.failed.get(code, {}).get("attempts", 0)) + 1
+        self.failed[code] = {"error_type": error_type, "error": error, "attempts": attempts}
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(max(seconds, 0))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{secs:02d}s" if hours else f"{minutes}m{secs:02d}s"
+
+
+def fetch_one(
+    provider: AKShareProvider,
+    limiter: RateLimiter,
+    code: str,
+) -> Tuple[str, str | None, str | None, bool]:
+    # Current caches cost nothing and do not consume the rate budget.
+    try:
+        cached = provider.history_cache_status(code) == CACHE_HIT
+    except Exception:
+        cached = False
+    if cached:
+        return code, None, None, True
+    limiter.acquire()
+    hist, error_type, error = provider.get_history_safe(code)
+    if hist is None:
+        return code, error_type or DATA_ERROR, error, False
+    return code, None, None, False
+
+
+def run_pass(
+    provider: AKShareProvider,
+    state: BackfillState,
+    queue: List[str],
+    workers: int,
+    limiter: RateLimiter,
+    pass_no: int,
+) -> None:
+    started = time.time()
+    last_checkpoint = started
+    last_report = 0.0
+    finished = 0
+    fetched = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lite-backfill") as pool:
+        futures = [pool.submit(bind(fetch_one), provider, limiter, code) for code in queue]
+        try:
+            for future in as_completed(futures):
+                code, error_type, error, cached = future.result()
+                state.mark(code, error_type, error)
+                finished += 1
+                failed += error_type is not None
+                fetched += not cached and error_type is None
+                now = time.time()
+                if now - last_checkpoint >= BACKFILL_CHECKPOINT_SECONDS:
+                    state.save()
+                    last_checkpoint = now
+                if now - last_report >= 2.0 or finished == len(queue):
+                    rate = finished / max(now - started, 1e-6)
+                    eta = (len(queue) - finished) / rate if rate > 0 else 0.0
+                    print(
+                        f"[pass {pass_no}] {finished}/{len(queue)}"
+                        f"  fetched {fetched}  failed {failed}"
+                        f"  {rate:.1f}/s  ETA {_format_seconds(eta)}",
+                        flush=True,
+                    )
+                    last_report = now
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            state.save()
+
+
+def load_universe(provider: AKShareProvider, args: argparse.Namespace) -> List[str]:
+    if args.codes_file:
+        return parse_codes(Path(args.codes_file).expanduser().read_text(encoding="utf-8"))
+    return [c.code for c in provider.get_auto_candidates(limit=args.limit)]
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Populate the history cache for the whole market (resumable).")
+    p.add_argument("--codes-file", default="", help="Backfill these codes instead of the full spot universe")
+    p.add_argument("--limit", type=int, default=UNIVERSE_LIMIT, help="Universe size when taken from the spot snapshot")
+    p.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="Parallel history fetches")
+    p.add_argument(
+        "--rate",
+        type=float,
+        default=BACKFILL_RATE_PER_SECOND,
+        help="Maximum history downloads per second across all workers (0 = unlimited)",
+    )
+    p.add_argument("--passes", type=int, default=BACKFILL_PASSES, help="Passes; later ones retry network failures")
+    p.add_argument("--retry-data", action="store_true", help="Also retry symbols that failed with data errors")
+    p.add_argument("--state", default="", help="Checkpoint file (default <cache>/backfill_state.json)")
+    p.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    p.add_argument("--replay", default="", help="Read recorded data from this directory (offline testing)")
+    p.add_argument("--cache-dir", default="", help="History cache directory used with --replay")
+    return p.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.replay:
+        from lite_tool.replay import ReplayProvider
+
+        cache_dir = Path(args.cache_dir).expanduser() if args.cache_dir else None
+        provider: AKShareProvider = ReplayProvider(Path(args.replay).expanduser().resolve(), cache_dir=cache_dir)
+    else:
+        provider = AKShareProvider()
+    state_path = Path(args.state).expanduser() if args.state else provider.cache_dir / "backfill_state.json"
+
+    state = None if args.restart else BackfillState.load(state_path)
+    if state is None:
+        codes = load_universe(provider, args)
+        if not codes:
+            raise SystemExit("No valid codes to backfill.")
+        state = BackfillState(state_path, codes)
+        state.save()
+        print(f"New backfill of {len(codes)} codes, checkpoint: {state_path}")
+    else:
+        print(
+            f"Resuming backfill from {state_path}: {len(state.done)}/{len(state.codes)} done,"
+            f" {len(state.failed)} failed so far"
+        )
+
+    limiter = RateLimiter(args.rate)
+    try:
+        for pass_no in range(1, args.passes + 1):
+            queue = state.pending(retry_data=args.retry_data and pass_no == 1)
+            if not queue:
+                break
+            if pass_no > 1:
+                # Give a rate-limiting or flaky source a moment before retrying.
+                print(f"Retrying {len(queue)} failed codes in {BACKFILL_PASS_PAUSE_SECONDS}s...")
+                time.sleep(BACKFILL_PASS_PAUSE_SECONDS)
+            state.passes += 1
+            run_pass(provider, state, queue, args.workers, limiter, state.passes)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; progress saved. Run the same command again to resume ({state_path}).")
+        raise SystemExit(130)
+
+    remaining = state.pending(retry_data=True)
+    print(f"Backfill finished: {len(state.done)}/{len(state.codes)} cached, {len(remaining)} failed.")
+    if remaining:
+        network = sum(1 for code in remaining if state.failed.get(code, {}).get("error_type") == NETWORK_ERROR)
+        print(f"  network errors: {network} (re-run to retry), data errors: {len(remaining) - network}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from lite_tool.akshare_provider import AKShareProvider, Candidate
+from lite_tool.export import EXPORT_FORMATS, ResultExporter, export_results
+from lite_tool.panel import score_candidates_in_processes
+from lite_tool.pipeline import (
+    parse_codes,
+    refresh_latest_bars,
+    schedule_candidates,
+    score_candidates,
+)
+from lite_tool.ranking import rank_within_industry
+from lite_tool.resample import BAR_PERIODS, DAILY
+from lite_tool.tracing import collect, span, stage_breakdown
+
+
+OUTPUT_FORMATS = ("json", *EXPORT_FORMATS)
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run the Buffett Lite screening pipeline without the UI.")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--codes", help="Codes separated by comma/space, e.g. '600519,000858'")
+    src.add_argument("--codes-file", help="Text file with codes (any separator)")
+    src.add_argument("--auto", type=int, help="Use the top-N turnover auto universe")
+    p.add_argument("--concurrency", type=int, default=4, help="Parallel history fetches")
+    p.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Score in this many worker processes over a shared-memory price panel (1 = in-process)",
+    )
+    p.add_argument(
+        "--budget",
+        type=float,
+        default=0.0,
+        help="Time budget in seconds; candidates not started in time are skipped (0 = unlimited)",
+    )
+    p.add_argument(
+        "--period",
+        choices=BAR_PERIODS,
+        default=DAILY,
+        help=(
+            "Score on daily bars (last year) or on weekly/monthly bars resampled from "
+            "the whole daily cache (about three years)"
+        ),
+    )
+    p.add_argument(
+        "--industry",
+        action="store_true",
+        help="Add industry-relative ranks and factor percentiles next to the absolute score",
+    )
+    p.add_argument("--out", required=True, help="Output path (.csv / .json / .parquet / .xlsx)")
+    p.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=None,
+        help="Output format; inferred from --out suffix when omitted",
+    )
+    return p.parse_args(argv)
+
+
+def load_candidates(provider: AKShareProvider, args: argparse.Namespace) -> List[Candidate]:
+    if args.auto:
+        return provider.get_auto_candidates(limit=args.auto)
+    raw = args.codes or Path(args.codes_file).expanduser().read_text(encoding="utf-8")
+    codes = parse_codes(raw)
+    try:
+        name_map = provider.resolve_names(codes)
+    except Exception:
+        name_map = {}
+    return [Candidate(code=c, name=name_map.get(c, c)) for c in codes]
+
+
+def run_batch(
+    provider: AKShareProvider,
+    candidates: List[Candidate],
+    concurrency: int = 4,
+    budget_seconds: float = 0.0,
+    period: str = DAILY,
+    industry: bool = False,
+    sink: Callable[[Dict[str, object]], None] | None = None,
+    processes: int = 1,
+) -> Dict[str, object]:
+    # With a `sink`, result rows are handed over as they complete and not
+    # kept (report["results"] stays empty); ranking is then the sink's job.
+    with collect() as spans:
+        with span("batch.run", candidates=len(candidates)):
+            report = _run_batch(
+                provider, candidates, concurrency, budget_seconds, period, industry, sink, processes
+            )
+        report["timings"]["stages"] = stage_breakdown(spans)
+    return report
+
+
+def _run_batch(
+    provider: AKShareProvider,
+    candidates: List[Candidate],
+    concurrency: int,
+    budget_seconds: float,
+    period: str,
+    industry: bool,
+    sink: Callable[[Dict[str, object]], None] | None,
+    processes: int,
+) -> Dict[str, object]:
+    started = time.time()
+    scored = 0
+    deadline = started + budget_seconds if budget_seconds > 0 else None
+    rows: List[Dict[str, object]] = []
+    errors: List[Dict[str, object]] = []
+    fetch_total = 0.0
+    score_total = 0.0
+    with span("batch.schedule", candidates=len(candidates)):
+        scheduled, cache_status = schedule_candidates(provider, candidates)
+    with span("batch.refresh") as s:
+        refreshed = refresh_latest_bars(provider, scheduled, cache_status)
+        s.set(refreshed=refreshed)
+    if refreshed:
+        with span("batch.schedule", candidates=len(scheduled)):
+            scheduled, cache_status = schedule_candidates(provider, scheduled)
+    if processes > 1:
+        items = score_candidates_in_processes(
+            provider, scheduled, processes, fetch_workers=concurrency, deadline=deadline, period=period
+        )
+    else:
+        items = score_candidates(provider, scheduled, max_workers=concurrency, deadline=deadline, period=period)
+    # With a streaming sink this also covers writing the rows to the spool.
+    with span("batch.score", candidates=len(scheduled)):
+        for item in items:
+            fetch_total += item.fetch_seconds
+            score_total += item.score_seconds
+            timing = {
+                "fetch_ms": round(item.fetch_seconds * 1000.0, 1),
+                "score_ms": round(item.score_seconds * 1000.0, 1),
+            }
+            if item.result is None:
+                errors.append(
+                    {
+                        "code": item.candidate.code,
+                        "name": item.candidate.name,
+                        "stage": item.stage,
+                        "error_type": item.error_type,
+                        "error": item.error,
+                        **timing,
+                    }
+                )
+                continue
+            scored += 1
+            row = {**item.result.to_dict(), **timing}
+            if sink is not None:
+                sink(row)
+            else:
+                rows.append(row)
+
+    with span("batch.rank", rows=len(rows)):
+        rows.sort(key=lambda r: float(r["score"]), reverse=True)
+        for rank, row in enumerate(rows, start=1):
+            row["rank"] = rank
+    industry_report: Dict[str, object] = {}
+    if industry and rows:
+        try:
+            industry_map = provider.get_industry_map()
+        except Exception as exc:
+            industry_report["error"] = str(exc)
+        else:
+            rank_started = time.perf_counter()
+            with span("batch.industry_rank", rows=len(rows)):
+                ranked = rank_within_industry(pd.DataFrame(rows), industry_map)
+                rows = ranked.astype(object).where(ranked.notna(), None).to_dict("records")
+            industry_report = {
+                "classified": int(ranked["industry"].notna().sum()),
+                "industries": int(ranked["industry"].nunique()),
+                "rank_ms": round((time.perf_counter() - rank_started) * 1000.0, 2),
+            }
+    return {
+        "results": rows,
+        "scored": scored,
+        "errors": errors,
+        "skipped": len(candidates) - scored - len(errors),
+        "cache": {
+            status: sum(1 for s in cache_status.values() if s == status)
+            for status in sorted(set(cache_status.values()))
+        },
+        "spot_refreshed": refreshed,
+        **({"industry": industry_report} if industry else {}),
+        "timings": {
+            "wall_seconds": round(time.time() - started, 3),
+            "fetch_seconds_total": round(fetch_total, 3),
+            "score_seconds_total": round(score_total, 3),
+        },
+    }
+
+
+def write_output(report: Dict[str, object], out_path: Path, fmt: str) -> List[Path]:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "json":
+        out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        return [out_path]
+
+    meta = {k: v for k, v in report.items() if k != "results"}
+    try:
+        return export_results(report["results"], out_path, fmt, meta)
+    except RuntimeError as exc:
+        raise SystemExit(str(exc)) from exc
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    out_path = Path(args.out).expanduser().resolve()
+    fmt = args.format or out_path.suffix.lstrip(".").lower()
+    if fmt not in OUTPUT_FORMATS:
+        raise SystemExit(f"Unsupported output format: {fmt} (use one of {', '.join(OUTPUT_FORMATS)})")
+
+    provider = AKShareProvider()
+    started = time.time()
+    candidates = load_candidates(provider, args)
+    universe_seconds = time.time() - started
+    if not candidates:
+        raise SystemExit("No valid candidates.")
+
+    # Industry ranks and JSON need the whole table; otherwise rows stream
+    # straight to the output file.
+    exporter = None
+    if fmt != "json" and not args.industry:
+        exporter = ResultExporter(out_path, fmt)
+    try:
+        report = run_batch(
+            provider,
+            candidates,
+            concurrency=args.concurrency,
+            budget_seconds=args.budget,
+            period=args.period,
+            industry=args.industry,
+            sink=exporter.add if exporter is not None else None,
+            processes=args.processes,
+        )
+    except BaseException:
+        if exporter is not None:
+            exporter.discard()
+        raise
+    report["timings"]["universe_seconds"] = round(universe_seconds, 3)
+    report["meta"] = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "universe": f"auto:{args.auto}" if args.auto else "codes",
+        "candidate_count": len(candidates),
+        "concurrency": args.concurrency,
+        "processes": args.processes,
+        "period": args.period,
+        "budget_seconds": args.budget,
+    }
+    # The written report cannot contain its own export time; it is printed.
+    export_started = time.time()
+    if exporter is not None:
+        exporter.meta.update({k: v for k, v in report.items() if k != "results"})
+        try:
+            written = exporter.close()
+        except RuntimeError as exc:
+            raise SystemExit(str(exc)) from exc
+    else:
+        written = write_output(report, out_path, fmt)
+    print(
+        f"Scored {report['scored']}/{len(candidates)} "
+        f"({len(report['errors'])} failed, {report['skipped']} skipped) "
+        f"in {report['timings']['wall_seconds']}s"
+    )
+    for path in written:
+        print(f"Written: {path}")
+    print(f"Export took {time.time() - export_started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
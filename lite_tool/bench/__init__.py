@@ -0,0 +1 @@
+"""Offline benchmarks on synthetic market data."""
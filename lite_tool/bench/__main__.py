@@ -0,0 +1,3 @@
+from lite_tool.bench.run import main
+
+main()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from lite_tool.bench.synthetic import synthetic_codes, write_replay_dir
+from lite_tool.pipeline import AUTO_MODE, RunRequest, run_screening
+from lite_tool.replay import ReplayProvider
+from lite_tool.scoring import evaluate_candidate
+
+
+DEFAULT_SIZES = (30, 500, 5000)
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / "lite_bench_data"
+
+
+def _stats(name: str, symbols: int, samples: List[float]) -> Dict[str, object]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+    return {
+        "name": name,
+        "symbols": symbols,
+        "calls": len(samples),
+        "total_s": round(sum(samples), 4),
+        "median_ms": round(statistics.median(ordered) * 1000.0, 3) if ordered else 0.0,
+        "p95_ms": round(p95 * 1000.0, 3),
+        "max_ms": round(ordered[-1] * 1000.0, 3) if ordered else 0.0,
+    }
+
+
+def _time_each(fn: Callable[[str], object], items: List[str]) -> List[float]:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        try:
+            fn(item)
+        except Exception:
+            # Synthetic data includes symbols that are meant to fail
+            # (short histories); their cost still counts.
+            pass
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _time_once(fn: Callable[[], object]) -> List[float]:
+    started = time.perf_counter()
+    fn()
+    return [time.perf_counter() - started]
+
+
+def bench_size(replay_dir: Path, symbols: int) -> List[Dict[str, object]]:
+    codes = synthetic_codes(symbols)
+    rows: List[Dict[str, object]] = []
+
+    with tempfile.TemporaryDirectory(prefix="lite_bench_") as tmp:
+        cache_dir = Path(tmp)
+        provider = ReplayProvider(replay_dir, cache_dir=cache_dir)
+        rows.append(_stats("get_history_cold", symbols, _time_each(provider.get_history, codes)))
+        rows.append(_stats("get_history_hit_memo", symbols, _time_each(provider.get_history, codes)))
+
+        disk_provider = ReplayProvider(replay_dir, cache_dir=cache_dir)
+        rows.append(_stats("get_history_hit_disk", symbols, _time_each(disk_provider.get_history, codes)))
+
+        histories = []
+        for code in codes:
+            try:
+                histories.append((code, provider.get_history(code)))
+            except Exception:
+                continue
+        samples = []
+        for code, hist in histories:
+            started = time.perf_counter()
+            evaluate_candidate(code, code, hist)
+            samples.append(time.perf_counter() - started)
+        rows.append(_stats("evaluate_candidate", symbols, samples))
+
+    with tempfile.TemporaryDirectory(prefix="lite_bench_") as tmp:
+        provider = ReplayProvider(replay_dir, cache_dir=Path(tmp))
+        rows.append(_stats("resolve_names_cold", symbols, _time_once(lambda: provider.resolve_names(codes))))
+        rows.append(_stats("resolve_names_warm", symbols, _time_once(lambda: provider.resolve_names(codes))))
+
+    with tempfile.TemporaryDirectory(prefix="lite_bench_") as tmp:
+        provider = ReplayProvider(replay_dir, cache_dir=Path(tmp))
+        rows.append(
+            _stats("get_auto_candidates_cold", symbols, _time_once(lambda: provider.get_auto_candidates(symbols)))
+        )
+        reopened = ReplayProvider(replay_dir, cache_dir=Path(tmp))
+        rows.append(
+            _stats(
+                "get_auto_candidates_file", symbols, _time_once(lambda: reopened.get_auto_candidates(symbols))
+            )
+        )
+
+    with tempfile.TemporaryDirectory(prefix="lite_bench_") as tmp:
+        provider = ReplayProvider(replay_dir, cache_dir=Path(tmp))
+        request = RunRequest(mode=AUTO_MODE, auto_limit=symbols)
+        for label in ("pipeline_cold", "pipeline_warm"):
+            summary = None
+
+            def run() -> None:
+                nonlocal summary
+                summary = run_screening(provider, request, budget_seconds=float("inf"))
+
+            row = _stats(label, symbols, _time_once(run))
+            assert summary is not None
+            row["scored"] = summary.success_count
+            row["failed"] = summary.failed_count
+            rows.append(row)
+    return rows
+
+
+def _git_commit() -> str:
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return proc.stdout.strip() if proc.returncode == 0 else ""
+
+
+def print_comparison(current: List[Dict[str, object]], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(r["name"], r["symbols"]): r for r in baseline.get("results", [])}
+    commit = baseline.get("meta", {}).get("commit", "?")
+    print(f"\nCompared with {baseline_path.name} (commit {commit}):")
+    for row in current:
+        old = previous.get((row["name"], row["symbols"]))
+        if old is None or not old["total_s"]:
+            continue
+        change = (float(row["total_s"]) / float(old["total_s"]) - 1.0) * 100.0
+        print(f"{row['name']:>26} {row['symbols']:>6}  {old['total_s']:>9.3f}s -> {row['total_s']:>9.3f}s  {change:+6.1f}%")
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark Buffett Lite on synthetic market data (offline).")
+    p.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma-separated universe sizes",
+    )
+    p.add_argument("--seed", type=int, default=7, help="Random seed for the synthetic data")
+    p.add_argument(
+        "--data-dir",
+        default=str(DEFAULT_DATA_DIR),
+        help="Where generated data is kept between runs",
+    )
+    p.add_argument("--out", default="", help="Result JSON path (default bench_<timestamp>.json)")
+    p.add_argument("--compare", default="", help="Earlier result JSON to compare against")
+    return p.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results: List[Dict[str, object]] = []
+    for symbols in sizes:
+        replay_dir = Path(args.data_dir).expanduser() / f"{symbols}_{args.seed}"
+        started = time.perf_counter()
+        write_replay_dir(replay_dir, symbols, seed=args.seed)
+        print(f"[{symbols}] data ready in {time.perf_counter() - started:.1f}s ({replay_dir})")
+        for row in bench_size(replay_dir, symbols):
+            results.append(row)
+            print(
+                f"[{symbols}] {row['name']:>26}: total {row['total_s']:.3f}s"
+                f"  median {row['median_ms']:.2f}ms  p95 {row['p95_ms']:.2f}ms"
+            )
+
+    payload = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    out = Path(args.out or f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json").expanduser()
+    out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Wrote {out}")
+    if args.compare:
+        print_comparison(results, Path(args.compare).expanduser())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from ..config import HISTORY_STORE_DAYS
+
+# Column layout of akshare's stock_zh_a_spot_em / stock_zh_a_hist, so the
+# generated files go through the same parsing as live data.
+SPOT_COLUMNS = [
+    "序号",
+    "代码",
+    "名称",
+    "最新价",
+    "涨跌幅",
+    "涨跌额",
+    "成交量",
+    "成交额",
+    "振幅",
+    "最高",
+    "最低",
+    "今开",
+    "昨收",
+    "量比",
+    "换手率",
+    "市盈率-动态",
+    "市净率",
+    "总市值",
+    "流通市值",
+]
+HIST_COLUMNS = ["日期", "股票代码", "开盘", "收盘", "最高", "最低", "成交量", "成交额", "振幅", "涨跌幅", "涨跌额", "换手率"]
+
+INDUSTRIES = ["银行", "证券", "白酒", "医药制造", "半导体", "电力", "汽车整车", "化学制品", "软件开发", "房地产开发"]
+UNCLASSIFIED_RATE = 0.02
+NAME_CHARS = "华中国东方海新天金山长江科技电子能源医药银行证券汽车材料通信电力建设发展控股"
+SHORT_HISTORY_RATE = 0.03
+SUSPENSION_RATE = 0.08
+GAP_RATE = 0.01
+NAN_RATE = 0.002
+
+
+def synthetic_codes(count: int) -> List[str]:
+    # Spread across the Shanghai main board, Shenzhen main board and ChiNext.
+    prefixes = ("600", "000", "300", "601", "002")
+    codes = []
+    for i in range(count):
+        prefix = prefixes[i % len(prefixes)]
+        codes.append(f"{prefix}{i // len(prefixes):03d}")
+    return codes
+
+
+def _synthetic_name(rng: np.random.Generator) -> str:
+    chars = rng.choice(list(NAME_CHARS), size=int(rng.integers(2, 5)))
+    name = "".join(chars)
+    # Some feeds pad three-character names with spaces ("五 粮 液").
+    if len(name) == 3 and rng.random() < 0.2:
+        name = " ".join(name)
+    return name
+
+
+def trading_days(end: date, calendar_days: int) -> pd.DatetimeIndex:
+    start = end - timedelta(days=calendar_days)
+    return pd.bdate_range(start=start, end=end)
+
+
+def generate_history(code: str, rng: np.random.Generator, end: date | None = None) -> pd.DataFrame:
+    end = end or date.today()
+    days = trading_days(end, HISTORY_STORE_DAYS * 2)
+    if rng.random() < SHORT_HISTORY_RATE:
+        # Newly listed: fewer bars than MIN_HISTORY_BARS.
+        days = days[-int(rng.integers(20, 100)):]
+
+    keep = rng.random(len(days)) >= GAP_RATE
+    if rng.random() < SUSPENSION_RATE:
+        # akshare omits suspended days entirely; the price resumes with a jump.
+        length = int(rng.integers(5, 40))
+        start = int(rng.integers(0, max(len(days) - length, 1)))
+        keep[start:start + length] = False
+    # A short history can be suspended end to end; it still trades today.
+    keep[-1] = True
+    days = days[keep]
+
+    n = len(days)
+    drift = rng.normal(0.0003, 0.0005)
+    vol = rng.uniform(0.012, 0.035)
+    returns = rng.normal(drift, vol, n)
+    returns = np.clip(returns, -0.1, 0.1)
+    close = float(rng.uniform(3.0, 150.0)) * np.exp(np.cumsum(returns))
+    prev_close = np.concatenate([[close[0]], close[:-1]])
+    open_ = prev_close * (1 + rng.normal(0, vol / 3, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n)))
+    volume = rng.lognormal(mean=11.5, sigma=0.6, size=n).round()
+    turnover = volume * close * 100
+
+    df = pd.DataFrame(
+        {
+            "日期": days.strftime("%Y-%m-%d"),
+            "股票代码": code,
+            "开盘": open_.round(2),
+            "收盘": close.round(2),
+            "最高": high.round(2),
+            "最低": low.round(2),
+            "成交量": volume,
+            "成交额": turnover.round(2),
+            "振幅": ((high - low) / prev_close * 100).round(2),
+            "涨跌幅": ((close / prev_close - 1) * 100).round(2),
+            "涨跌额": (close - prev_close).round(2),
+            "换手率": rng.uniform(0.2, 8.0, n).round(2),
+        },
+        columns=HIST_COLUMNS,
+    )
+    for col in ("收盘", "成交量", "开盘"):
+        mask = rng.random(n) < NAN_RATE
+        df.loc[mask, col] = np.nan
+    return df
+
+
+def generate_spot(codes: List[str], rng: np.random.Generator) -> pd.DataFrame:
+    n = len(codes)
+    last = rng.uniform(3.0, 150.0, n).round(2)
+    pct = rng.normal(0, 2.0, n).clip(-10, 10).round(2)
+    prev_close = (last / (1 + pct / 100)).round(2)
+    volume = rng.lognormal(mean=11.5, sigma=1.0, size=n).round()
+    turnover = (volume * last * 100).round(2)
+    # Suspended names show no trade in the snapshot.
+    suspended = rng.random(n) < SUSPENSION_RATE / 4
+    volume[suspended] = 0.0
+    turnover[suspended] = 0.0
+    pe = rng.lognormal(mean=3.0, sigma=0.8, size=n).round(2)
+    # Loss-making companies report a negative PE.
+    loss_making = rng.random(n) < 0.08
+    pe[loss_making] = -pe[loss_making]
+    market_cap = (last * rng.lognormal(mean=20.0, sigma=1.2, size=n)).round(0)
+    df = pd.DataFrame(
+        {
+            "序号": np.arange(1, n + 1),
+            "代码": codes,
+            "名称": [_synthetic_name(rng) for _ in range(n)],
+            "最新价": last,
+            "涨跌幅": pct,
+            "涨跌额": (last - prev_close).round(2),
+            "成交量": volume,
+            "成交额": turnover,
+            "振幅": rng.uniform(0.5, 9.0, n).round(2),
+            "最高": (last * 1.02).round(2),
+            "最低": (last * 0.98).round(2),
+            "今开": prev_close,
+            "昨收": prev_close,
+            "量比": rng.uniform(0.3, 3.0, n).round(2),
+            "换手率": rng.uniform(0.2, 8.0, n).round(2),
+            "市盈率-动态": pe,
+            "市净率": rng.lognormal(mean=0.7, sigma=0.6, size=n).round(2),
+            "总市值": market_cap,
+            "流通市值": (market_cap * rng.uniform(0.3, 1.0, n)).round(0),
+        },
+        columns=SPOT_COLUMNS,
+    )
+    df.loc[rng.random(n) < NAN_RATE * 10, "名称"] = np.nan
+    return df
+
+
+def generate_industries(codes: List[str], rng: np.random.Generator) -> pd.DataFrame:
+    # Uneven industry sizes; a few symbols belong to no board.
+    weights = rng.dirichlet(np.ones(len(INDUSTRIES)))
+    industry = rng.choice(INDUSTRIES, size=len(codes), p=weights)
+    df = pd.DataFrame({"code": codes, "industry": industry})
+    return df[rng.random(len(codes)) >= UNCLASSIFIED_RATE]
+
+
+def write_replay_dir(target: Path, symbols: int, seed: int = 7) -> Path:
+    # Lays out `spot.csv`, `industry.csv` and `hist_{code}.csv` as
+    # ReplayProvider expects.
+    # A directory already holding the same layout is reused.
+    target = Path(target)
+    marker = target / f".generated_v2_{symbols}_{seed}"
+    if marker.exists():
+        return target
+    target.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    codes = synthetic_codes(symbols)
+    generate_spot(codes, rng).to_csv(target / "spot.csv", index=False, encoding="utf-8")
+    end = date.today()
+    for code in codes:
+        generate_history(code, rng, end).to_csv(target / f"hist_{code}.csv", index=False, encoding="utf-8")
+    generate_industries(codes, rng).to_csv(target / "industry.csv", index=False, encoding="utf-8")
+    marker.touch()
+    return target
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import compileall
+import json
 import os
 import shutil
+import socket
 import subprocess
 import sys
+import time
+import urllib.request
+from datetime import datetime
 from pathlib import Path
 
 
@@ -12,6 +18,31 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 LITE_DIR = PROJECT_ROOT / "lite_tool"
 DIST_DIR = PROJECT_ROOT / "lite_tool" / "dist_exec"
 BUILD_DIR = PROJECT_ROOT / "lite_tool" / "build_exec"
+STARTUP_REPORT = DIST_DIR / "startup_report.json"
+
+# Sub-packages needed at runtime even if an import trace of a single page
+# render does not touch them (server internals, akshare's data-file packages).
+TRACE_KEEP = {
+    "akshare.data",
+    "akshare.file_fold",
+    "streamlit.components",
+    "streamlit.elements",
+    "streamlit.proto",
+    "streamlit.runtime",
+    "streamlit.static",
+    "streamlit.vendor",
+    "streamlit.web",
+}
+TRACE_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import streamlit.web.bootstrap
+import streamlit.web.server.server
+import akshare
+import lite_tool.akshare_provider, lite_tool.jobs, lite_tool.licensing
+from streamlit.testing.v1 import AppTest
+AppTest.from_file({app!r}, default_timeout=60).run()
+"""
 
 
 def parse_args() -> argparse.Namespace:
@@ -22,6 +53,23 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Clean previous build dirs before build",
     )
+    p.add_argument(
+        "--profile",
+        choices=["default", "startup"],
+        default="default",
+        help="startup: precompile bytecode and exclude sub-packages unused per an import trace",
+    )
+    p.add_argument(
+        "--no-startup-report",
+        action="store_true",
+        help="Skip launching the build to measure cold start",
+    )
+    p.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.0,
+        help="Fail if cold start is this many percent slower than the last build of the same profile",
+    )
     return p.parse_args()
 
 
@@ -35,10 +83,22 @@ def _add_data_args() -> list[str]:
         LITE_DIR / "__init__.py",
         LITE_DIR / "app.py",
         LITE_DIR / "akshare_provider.py",
+        LITE_DIR / "cache_client.py",
+        LITE_DIR / "cache_server.py",
         LITE_DIR / "config.py",
+        LITE_DIR / "export.py",
+        LITE_DIR / "jobs.py",
         LITE_DIR / "limits.py",
         LITE_DIR / "licensing.py",
+        LITE_DIR / "pipeline.py",
+        LITE_DIR / "profiling.py",
+        LITE_DIR / "resample.py",
+        LITE_DIR / "run_cache.py",
         LITE_DIR / "scoring.py",
+        LITE_DIR / "store.py",
+        LITE_DIR / "tracing.py",
+        LITE_DIR / "trading_calendar.py",
+        LITE_DIR / "watchlist.py",
         LITE_DIR / "public_key.pem",
     ]
     args: list[str] = []
@@ -57,6 +117,180 @@ def _require_public_key() -> Path:
     return key_path
 
 
+def _trace_used_modules() -> set[str]:
+    script = TRACE_SCRIPT.format(root=str(PROJECT_ROOT), app=str(LITE_DIR / "app.py"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "LITE_REQUIRE_LICENSE": "0"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import trace failed:\n{proc.stderr[-2000:]}")
+    used = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            used.add(line.rsplit("|", 1)[1].strip())
+    # The trace harness itself is not part of the app.
+    return {m for m in used if not m.startswith("streamlit.testing")}
+
+
+def _unused_subpackages(used: set[str], packages: tuple[str, ...] = ("streamlit", "akshare")) -> list[str]:
+    import importlib
+    import pkgutil
+
+    unused: list[str] = []
+    for package in packages:
+        module = importlib.import_module(package)
+        for info in pkgutil.iter_modules(module.__path__):
+            name = f"{package}.{info.name}"
+            if not info.ispkg or name in TRACE_KEEP:
+                continue
+            if not any(m == name or m.startswith(f"{name}.") for m in used):
+                unused.append(name)
+    return sorted(unused)
+
+
+def _bundle_dir(name: str) -> Path:
+    return DIST_DIR / name
+
+
+def _executable_path(name: str) -> Path:
+    suffix = ".exe" if os.name == "nt" else ""
+    return _bundle_dir(name) / f"{name}{suffix}"
+
+
+def _precompile_bundled_sources(name: str) -> int:
+    # App modules ship as data files and are imported from source at runtime;
+    # a signed .app cannot write __pycache__, so compile them at build time.
+    compiled = 0
+    for app_file in _bundle_dir(name).rglob("lite_tool/app.py"):
+        compileall.compile_dir(str(app_file.parent), quiet=1, workers=0)
+        compiled += 1
+    return compiled
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _first_render_mark(report_path: Path) -> float | None:
+    try:
+        lines = report_path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        record = json.loads(line)
+        if record.get("label") == "first_render":
+            return float(record["seconds"])
+    return None
+
+
+def _open_page_session(port: int, report_path: Path, deadline: float) -> float:
+    # A Streamlit script only runs for a connected page: open its websocket
+    # and request the first run the way the browser frontend does, then wait
+    # for app.py to record its first_render mark.
+    try:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from websockets.sync.client import connect
+    except ImportError as exc:
+        raise SystemExit("Measuring first render needs websockets: pip install websockets") from exc
+    rerun = BackMsg()
+    rerun.rerun_script.query_string = ""
+    with connect(f"ws://127.0.0.1:{port}/_stcore/stream", open_timeout=10) as ws:
+        ws.send(rerun.SerializeToString())
+        while time.time() < deadline:
+            try:
+                ws.recv(timeout=0.5)
+            except TimeoutError:
+                pass
+            first_render = _first_render_mark(report_path)
+            if first_render is not None:
+                return first_render
+    raise RuntimeError("App did not render its first page in time")
+
+
+def _measure_cold_start(name: str, timeout: float = 180.0) -> dict[str, float]:
+    port = _free_port()
+    report_path = DIST_DIR / f".startup_marks_{port}.jsonl"
+    report_path.unlink(missing_ok=True)
+    started = time.time()
+    env = {
+        **os.environ,
+        "LITE_HEADLESS": "1",
+        "LITE_SERVER_PORT": str(port),
+        # Read by profiling.record_startup_mark; marks count from launch.
+        "LITE_STARTUP_REPORT": str(report_path),
+        "LITE_PROCESS_STARTED": str(started),
+    }
+    proc = subprocess.Popen(
+        [str(_executable_path(name))],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    ready_seconds = -1.0
+    try:
+        while time.time() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        ready_seconds = time.time() - started
+                        break
+            except OSError:
+                time.sleep(0.2)
+        if ready_seconds < 0:
+            raise RuntimeError(f"Executable did not become ready within {timeout:.0f}s")
+        first_render_seconds = _open_page_session(port, report_path, started + timeout)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        report_path.unlink(missing_ok=True)
+    return {
+        "server_ready_seconds": round(ready_seconds, 3),
+        "first_render_seconds": round(first_render_seconds, 3),
+    }
+
+
+def _bundle_size_mb(name: str) -> float:
+    total = sum(p.stat().st_size for p in _bundle_dir(name).rglob("*") if p.is_file())
+    return round(total / (1024 * 1024), 1)
+
+
+def _record_startup_report(entry: dict[str, object], max_regression: float) -> None:
+    history: list[dict[str, object]] = []
+    if STARTUP_REPORT.exists():
+        try:
+            history = json.loads(STARTUP_REPORT.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            history = []
+    # Older entries only have server_ready_seconds and are not comparable.
+    previous = next(
+        (h for h in reversed(history) if h.get("profile") == entry["profile"] and "first_render_seconds" in h),
+        None,
+    )
+    history.append(entry)
+    STARTUP_REPORT.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    current = float(entry["first_render_seconds"])
+    print(
+        f"Cold start to first render: {current:.2f}s"
+        f" (server ready {entry['server_ready_seconds']:.2f}s, report: {STARTUP_REPORT})"
+    )
+    if previous is None:
+        return
+    baseline = float(previous["first_render_seconds"])
+    change = (current - baseline) / baseline * 100.0 if baseline > 0 else 0.0
+    print(f"Previous {entry['profile']} build: {baseline:.2f}s ({change:+.1f}%)")
+    if max_regression > 0 and change > max_regression:
+        raise SystemExit(f"Cold start regressed by {change:.1f}% (limit {max_regression:.1f}%)")
+
+
 def main() -> None:
     args = parse_args()
     key_path = _require_public_key()
@@ -68,6 +302,15 @@ def main() -> None:
     DIST_DIR.mkdir(parents=True, exist_ok=True)
     BUILD_DIR.mkdir(parents=True, exist_ok=True)
 
+    excluded: list[str] = []
+    if args.profile == "startup":
+        print("Tracing imports for a page render...")
+        excluded = _unused_subpackages(_trace_used_modules())
+        print(f"Excluding {len(excluded)} unused sub-packages: {', '.join(excluded) or '-'}")
+    exclude_args: list[str] = []
+    for module in excluded:
+        exclude_args.extend(["--exclude-module", module])
+
     cmd = [
         sys.executable,
         "-m",
@@ -84,14 +327,29 @@ def main() -> None:
         str(BUILD_DIR),
         "--collect-all",
         "streamlit",
+        *exclude_args,
         *_add_data_args(),
         str(LITE_DIR / "desktop_entry.py"),
     ]
 
     print("Running:", " ".join(cmd))
     subprocess.run(cmd, check=True)
+    if args.profile == "startup":
+        print(f"Precompiled {_precompile_bundled_sources(args.name)} bundled source dir(s).")
     print(f"Build done: {DIST_DIR / args.name}")
 
+    if args.no_startup_report:
+        return
+    entry: dict[str, object] = {
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "name": args.name,
+        "profile": args.profile,
+        "bundle_mb": _bundle_size_mb(args.name),
+        "excluded_modules": excluded,
+        **_measure_cold_start(args.name),
+    }
+    _record_startup_report(entry, args.max_regression)
+
 
 if __name__ == "__main__":
     main()
@@ -29,10 +29,22 @@ def build_bundle() -> Path:
         PROJECT_ROOT / "requirements.txt",
         LITE_DIR / "app.py",
         LITE_DIR / "akshare_provider.py",
+        LITE_DIR / "cache_client.py",
+        LITE_DIR / "cache_server.py",
         LITE_DIR / "config.py",
+        LITE_DIR / "export.py",
+        LITE_DIR / "jobs.py",
         LITE_DIR / "limits.py",
         LITE_DIR / "licensing.py",
+        LITE_DIR / "pipeline.py",
+        LITE_DIR / "profiling.py",
+        LITE_DIR / "resample.py",
+        LITE_DIR / "run_cache.py",
         LITE_DIR / "scoring.py",
+        LITE_DIR / "store.py",
+        LITE_DIR / "tracing.py",
+        LITE_DIR / "trading_calendar.py",
+        LITE_DIR / "watchlist.py",
         LITE_DIR / "__init__.py",
         LITE_DIR / "README.md",
         LITE_DIR / "launcher" / "start_lite.command",
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from multiprocessing.connection import Client
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+from .akshare_provider import PROVIDER_ERRORS, AKShareProvider, Candidate
+from .cache_server import load_authkey, parse_address
+from .config import CACHE_DIR, CACHE_SERVER_ENV, CACHE_SERVER_KEY_FILE, CACHE_SERVER_RETRY_SECONDS
+from .pipeline import RunRequest, RunSummary
+from .resample import DAILY
+from .run_cache import RunCache
+from .store import PriceStore
+from .tracing import span
+
+# Exceptions re-raised with their own type so callers (classify_error,
+# get_history_safe) treat remote failures like local ones.
+_REMOTE_ERRORS = {cls.__name__: cls for cls in (*PROVIDER_ERRORS, ValueError)}
+
+
+class CacheServerUnavailable(ConnectionError):
+    pass
+
+
+class CacheClient:
+    # One connection per thread (a Connection is not thread-safe and the
+    # pipeline fetches from a pool). After a failure the server is treated
+    # as down for CACHE_SERVER_RETRY_SECONDS so callers fall back quickly.
+    def __init__(self, address: str, authkey: bytes) -> None:
+        self.address = address
+        self._target, self._family = parse_address(address)
+        self._authkey = authkey
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if time.time() < self._down_until:
+                raise CacheServerUnavailable(f"缓存服务暂不可用：{self.address}")
+            conn = Client(self._target, family=self._family, authkey=self._authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def call(self, method: str, *args, **kwargs) -> object:
+        with span("cache_client.call", method=method):
+            try:
+                conn = self._connection()
+                conn.send((method, args, kwargs))
+                reply = conn.recv()
+            except CacheServerUnavailable:
+                raise
+            except (OSError, EOFError) as exc:
+                self._drop()
+                self._down_until = time.time() + CACHE_SERVER_RETRY_SECONDS
+                raise CacheServerUnavailable(f"缓存服务连接失败：{self.address}（{exc}）") from exc
+        if reply[0] == "ok":
+            return reply[1]
+        _, error_type, message = reply
+        raise _REMOTE_ERRORS.get(error_type, RuntimeError)(message)
+
+
+class RemoteProvider(AKShareProvider):
+    # Client mode: data calls go to the cache daemon, which owns the only
+    # copy of histories, the spot snapshot and the derived tables, so memory
+    # does not grow with the number of app replicas and a symbol fetched by
+    # one replica is immediately cached for all. While the daemon is
+    # unreachable the inherited in-process implementation serves the call
+    # (with a minimal local memo).
+    def __init__(self, client: CacheClient, cache_dir: Path = CACHE_DIR) -> None:
+        super().__init__(store=PriceStore(cache_dir=cache_dir, max_entries=1), cache_dir=cache_dir)
+        self.client = client
+
+    def _remote(self, method: str, *args, **kwargs):
+        try:
+            return True, self.client.call(method, *args, **kwargs)
+        except CacheServerUnavailable:
+            return False, None
+
+    def get_history(self, symbol: str) -> pd.DataFrame:
+        ok, value = self._remote("get_history", symbol)
+        return value if ok else super().get_history(symbol)
+
+    def get_bars(self, symbol: str, period: str = DAILY) -> pd.DataFrame:
+        ok, value = self._remote("get_bars", symbol, period)
+        return value if ok else super().get_bars(symbol, period)
+
+    def get_history_safe(
+        self,
+        symbol: str,
+        period: str = DAILY,
+    ) -> Tuple[pd.DataFrame | None, str | None, str | None]:
+        ok, value = self._remote("get_history_safe", symbol, period)
+        return value if ok else super().get_history_safe(symbol, period)
+
+    def history_cache_status(self, symbol: str) -> str:
+        ok, value = self._remote("history_cache_status", symbol)
+        return value if ok else super().history_cache_status(symbol)
+
+    def refresh_from_spot(self, codes: Iterable[str] | None = None) -> Dict[str, str]:
+        codes = None if codes is None else list(codes)
+        ok, value = self._remote("refresh_from_spot", codes)
+        return value if ok else super().refresh_from_spot(codes)
+
+    def resolve_names(self, codes: List[str]) -> Dict[str, str]:
+        ok, value = self._remote("resolve_names", list(codes))
+        return value if ok else super().resolve_names(codes)
+
+    def get_auto_candidates(self, limit: int) -> List[Candidate]:
+        ok, value = self._remote("get_auto_candidates", limit)
+        return value if ok else super().get_auto_candidates(limit)
+
+    def get_fundamentals(self) -> pd.DataFrame:
+        ok, value = self._remote("get_fundamentals")
+        return value if ok else super().get_fundamentals()
+
+    def valuation_inputs(self, symbol: str) -> Dict[str, float]:
+        ok, value = self._remote("valuation_inputs", symbol)
+        return value if ok else super().valuation_inputs(symbol)
+
+    def get_industry_map(self) -> Dict[str, str]:
+        ok, value = self._remote("get_industry_map")
+        return value if ok else super().get_industry_map()
+
+
+class RemoteRunCache(RunCache):
+    # Finished runs are shared through the daemon's run cache; the local
+    # on-disk cache is the fallback.
+    def __init__(self, client: CacheClient, cache_dir: Path = CACHE_DIR / "runs", calendar=None) -> None:
+        super().__init__(cache_dir=cache_dir, calendar=calendar)
+        self.client = client
+
+    def get(self, request: RunRequest) -> RunSummary | None:
+        try:
+            return self.client.call("run_cache_get", request)
+        except CacheServerUnavailable:
+            return super().get(request)
+
+    def put(self, request: RunRequest, summary: RunSummary) -> bool:
+        try:
+            return bool(self.client.call("run_cache_put", request, summary))
+        except CacheServerUnavailable:
+            return super().put(request, summary)
+
+
+def client_from_env() -> CacheClient | None:
+    # LITE_CACHE_SERVER=unix:/path/to.sock or host:port enables client mode.
+    address = os.environ.get(CACHE_SERVER_ENV, "").strip()
+    if not address:
+        return None
+    try:
+        authkey = load_authkey(CACHE_SERVER_KEY_FILE)
+    except OSError:
+        return None
+    return CacheClient(address, authkey)
+
+
+def provider_from_env() -> AKShareProvider:
+    client = client_from_env()
+    if client is None:
+        return AKShareProvider()
+    return RemoteProvider(client)
+
+
+def run_cache_for(provider: AKShareProvider) -> RunCache | None:
+    if isinstance(provider, RemoteProvider):
+        return RemoteRunCache(
+            provider.client,
+            cache_dir=provider.cache_dir / "runs",
+            calendar=provider.calendar,
+        )
+    return None
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import argparse
+import os
+import secrets
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, Listener, answer_challenge, deliver_challenge
+from pathlib import Path
+from typing import Dict, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from lite_tool.akshare_provider import AKShareProvider
+from lite_tool.config import CACHE_SERVER_ADDRESS, CACHE_SERVER_KEY_FILE
+from lite_tool.run_cache import RunCache
+
+# Provider methods a client may call; everything else is refused.
+PROVIDER_METHODS = frozenset(
+    {
+        "get_auto_candidates",
+        "get_bars",
+        "get_fundamentals",
+        "get_history",
+        "get_history_safe",
+        "get_industry_map",
+        "history_cache_status",
+        "refresh_from_spot",
+        "resolve_names",
+        "valuation_inputs",
+    }
+)
+
+
+def parse_address(address: str) -> Tuple[object, str]:
+    # "unix:/path/to.sock" or "host:port" -> (Listener/Client address, family).
+    if address.startswith("unix:"):
+        return address[len("unix:"):], "AF_UNIX"
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port)), "AF_INET"
+
+
+def load_authkey(path: Path = CACHE_SERVER_KEY_FILE, create: bool = False) -> bytes:
+    # Shared secret for the connection handshake. Messages are pickles, so
+    # only processes that can read this file (same user) may talk to the
+    # daemon.
+    if path.exists():
+        return path.read_bytes()
+    if not create:
+        raise FileNotFoundError(f"缓存服务密钥不存在：{path}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    key = secrets.token_bytes(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+class CacheServer:
+    # One provider (history store, spot snapshot, name/universe/fundamental
+    # tables) and one run cache for every app replica on the host. Each
+    # client connection gets a thread; the provider is already thread-safe.
+    def __init__(self, provider: AKShareProvider, address: str, authkey: bytes) -> None:
+        self.provider = provider
+        self.run_cache = RunCache(cache_dir=provider.cache_dir / "runs", calendar=provider.calendar)
+        self.address = address
+        self._authkey = authkey
+        self._calls: Dict[str, int] = {}
+        self._clients = 0
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            calls = dict(self._calls)
+            clients = self._clients
+        return {
+            "uptime_seconds": round(time.time() - self._started, 1),
+            "clients": clients,
+            "history_memo": self.provider.store.memo_size(),
+            "calls": calls,
+        }
+
+    def dispatch(self, method: str, args: tuple, kwargs: dict) -> object:
+        with self._lock:
+            self._calls[method] = self._calls.get(method, 0) + 1
+        if method in PROVIDER_METHODS:
+            return getattr(self.provider, method)(*args, **kwargs)
+        if method == "run_cache_get":
+            return self.run_cache.get(*args, **kwargs)
+        if method == "run_cache_put":
+            return self.run_cache.put(*args, **kwargs)
+        if method == "stats":
+            return self.stats()
+        if method == "ping":
+            return "pong"
+        raise ValueError(f"未知的缓存服务方法：{method}")
+
+    def _serve_client(self, conn: Connection) -> None:
+        # The handshake runs here rather than in accept(), so a client that
+        # connects and stays silent only holds up its own thread.
+        try:
+            deliver_challenge(conn, self._authkey)
+            answer_challenge(conn, self._authkey)
+        except (AuthenticationError, OSError, EOFError):
+            conn.close()
+            return
+        with self._lock:
+            self._clients += 1
+        try:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", self.dispatch(method, args, kwargs))
+                except Exception as exc:
+                    reply = ("error", type(exc).__name__, str(exc))
+                try:
+                    conn.send(reply)
+                except (OSError, ValueError):
+                    return
+        finally:
+            conn.close()
+            with self._lock:
+                self._clients -= 1
+
+    def serve_forever(self) -> None:
+        address, family = parse_address(self.address)
+        if family == "AF_UNIX" and os.path.exists(address):
+            os.unlink(address)
+        with Listener(address, family=family) as listener:
+            if family == "AF_UNIX":
+                os.chmod(address, 0o600)
+            print(f"Lite cache server listening on {self.address}", flush=True)
+            while True:
+                try:
+                    conn = listener.accept()
+                except OSError:
+                    # A client that vanished before being accepted.
+                    continue
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Shared cache daemon for Lite app replicas on one host.")
+    p.add_argument(
+        "--address",
+        default=CACHE_SERVER_ADDRESS,
+        help="unix:/path/to.sock or host:port (default %(default)s)",
+    )
+    p.add_argument("--key-file", default=str(CACHE_SERVER_KEY_FILE), help="Shared secret file (created if missing)")
+    p.add_argument("--replay", default="", help="Serve recorded data from this directory (offline testing)")
+    p.add_argument("--cache-dir", default="", help="History cache directory used with --replay")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.replay:
+        from lite_tool.replay import ReplayProvider
+
+        cache_dir = Path(args.cache_dir).expanduser() if args.cache_dir else None
+        provider: AKShareProvider = ReplayProvider(Path(args.replay).expanduser().resolve(), cache_dir=cache_dir)
+    else:
+        provider = AKShareProvider()
+    authkey = load_authkey(Path(args.key_file).expanduser(), create=True)
+    server = CacheServer(provider, args.address, authkey)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
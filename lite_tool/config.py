@@ -11,7 +11,7 @@ METRIC_HELP_TEXT = {
     "max_drawdown": "历史上从高点到低点的最大跌幅，越大代表抗压要求更高。",
 }
 FACTOR_HELP_TEXT = {
-    "valuation_score": "估值分：当前位置相对历史高低位，偏低通常更友好。",
+    "valuation_score": "估值分：市盈率在全市场的分位和当前价格在历史高低位的位置，偏低通常更友好。",
     "quality_score": "质量分：历史回撤表现，回撤越温和分数越高。",
     "momentum_score": "动量分：近期走势强弱，趋势更稳分数更高。",
     "volatility_score": "波动分：价格稳定性，波动越小分数越高。",
@@ -22,10 +22,48 @@ MIN_SUCCESS_TO_CHARGE = 3
 RUNTIME_BUDGET_SECONDS = 35
 FETCH_RETRIES = 2
 RETRY_BASE_WAIT_SECONDS = 0.8
+RATE_LIMIT_WAIT_SECONDS = 3.0
 AUTO_FILL_TARGET = 3
 AUTO_FILL_POOL_SIZE = 50
+EARLY_STOP_STABLE_ROUNDS = 5
+SPECULATIVE_FILL_WORKERS = 3
+SPECULATIVE_FILL_EXTRA = 2
+SPECULATIVE_MIN_OBSERVED = 2
 MIN_HISTORY_BARS = 120
 HISTORY_LOOKBACK_DAYS = 260
+HISTORY_STORE_DAYS = 780
+DATA_VERSION = 1
+JOB_WORKERS = 2
+HISTORY_MEMO_SIZE = 2000
+SPOT_MEMO_TTL_SECONDS = 600
+INDUSTRY_REFRESH_DAYS = 30
+MARKET_UTC_OFFSET_HOURS = 8
+MARKET_OPEN = (9, 15)
+MARKET_CLOSE = (15, 0)
+SESSION_SETTLE_MINUTES = 30
+CALENDAR_RETRY_SECONDS = 3600
+ADJUST_OVERLAP_DAYS = 14
+ADJUST_PRICE_TOLERANCE = 0.011
+JOB_RETENTION_SECONDS = 3600
+JOB_POLL_SECONDS = 0.5
+SERVICE_PORT = 8520
+SERVICE_FETCH_WORKERS = 4
+SERVICE_CACHE_SIZE = 256
+SERVICE_MAX_CODES = 500
+BACKFILL_WORKERS = 4
+BACKFILL_RATE_PER_SECOND = 4.0
+BACKFILL_PASSES = 3
+BACKFILL_CHECKPOINT_SECONDS = 5
+BACKFILL_PASS_PAUSE_SECONDS = 10
+WATCH_SCORE_DELTA = 5.0
+WATCH_WORKERS = 4
+EXPORT_CHUNK_ROWS = 2000
+PANEL_CHUNKS_PER_PROCESS = 4
+RESULT_EXPORT_ENABLED = False
+CACHE_SERVER_ENV = "LITE_CACHE_SERVER"
+CACHE_SERVER_ADDRESS = "127.0.0.1:8521"
+CACHE_SERVER_RETRY_SECONDS = 5
 STATE_DIR = Path.home() / ".factor_lab_lite"
 STATE_FILE = STATE_DIR / "run_limit.json"
 CACHE_DIR = STATE_DIR / "cache"
+CACHE_SERVER_KEY_FILE = STATE_DIR / "cache_server.key"
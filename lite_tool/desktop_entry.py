@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import importlib
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 
+os.environ.setdefault("LITE_PROCESS_STARTED", str(time.time()))
+
 from streamlit.web import bootstrap
 
 
+# Imported in the background while the server starts and the browser opens;
+# app.py defers these to the first run, which then finds them loaded.
+PRELOAD_MODULES = (
+    "pandas",
+    "lite_tool.akshare_provider",
+    "lite_tool.jobs",
+    "akshare",
+)
+
+
 def _resolve_app_path() -> Path:
     if getattr(sys, "frozen", False):
         base = Path(getattr(sys, "_MEIPASS", Path.cwd()))
@@ -14,22 +29,34 @@ def _resolve_app_path() -> Path:
     return Path(__file__).resolve().with_name("app.py")
 
 
+def _preload_modules(app_path: Path) -> None:
+    project_root = str(app_path.resolve().parents[1])
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # The app reports missing dependencies itself on first use.
+            continue
+
+
 def main() -> None:
     os.environ.setdefault("LITE_REQUIRE_LICENSE", "1")
     app_path = _resolve_app_path()
     if not app_path.exists():
         raise FileNotFoundError(f"未找到 app.py: {app_path}")
 
-    sys.argv = [
-        str(app_path),
-        "--server.port",
-        "8510",
-        "--client.toolbarMode",
-        "minimal",
-        "--browser.gatherUsageStats",
-        "false",
-    ]
-    bootstrap.run(str(app_path), "", [], {})
+    threading.Thread(target=_preload_modules, args=(app_path,), daemon=True).start()
+
+    flag_options = {
+        "server.port": int(os.getenv("LITE_SERVER_PORT", "8510")),
+        "server.headless": os.getenv("LITE_HEADLESS", "0").strip().lower() in {"1", "true", "yes"},
+        "client.toolbarMode": "minimal",
+        "browser.gatherUsageStats": False,
+    }
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(str(app_path), False, [], flag_options)
 
 
 if __name__ == "__main__":
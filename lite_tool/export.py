@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import csv
+from array import array
+import io
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from .config import EXPORT_CHUNK_ROWS
+
+EXPORT_FORMATS = ("csv", "parquet", "xlsx")
+# Industry-relative ranks (batch --industry) sit right next to the score.
+EXPORT_LEAD_COLUMNS = [
+    "rank",
+    "code",
+    "name",
+    "score",
+    "industry",
+    "industry_rank",
+    "industry_size",
+    "score_industry_pct",
+    "signal",
+    "risk_tag",
+]
+
+_TEXT_COLUMNS = ("code", "name", "signal", "risk_tag", "explanation", "industry")
+
+
+class ResultExporter:
+    # Writes a full ranking without holding it: rows go to a CSV spool in
+    # completion order, and only the score and the row's byte offset in the
+    # spool (16 bytes) are kept per row. close() reads the spool back in rank
+    # order, EXPORT_CHUNK_ROWS rows at a time (seeking to each row), and
+    # writes the requested format. Metadata goes to a `{stem}_meta.json` next
+    # to CSV/Parquet and to a second Excel sheet.
+    def __init__(self, out_path: Path, fmt: str, meta: Dict[str, object] | None = None) -> None:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {fmt}（可选 {', '.join(EXPORT_FORMATS)}）")
+        self.out_path = out_path
+        self.fmt = fmt
+        self.meta: Dict[str, object] = dict(meta or {})
+        self._spool_path = out_path.with_name(f".{out_path.name}.spool.csv")
+        self._spool = None
+        self._line = io.StringIO()
+        self._writer: csv.DictWriter | None = None
+        self._columns: List[str] = []
+        self._scores = array("d")
+        self._offsets = array("q")
+        self._spool_size = 0
+
+    def __enter__(self) -> "ResultExporter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.discard()
+
+    @property
+    def row_count(self) -> int:
+        return len(self._scores)
+
+    def _write_line(self) -> None:
+        data = self._line.getvalue().encode("utf-8")
+        self._line.seek(0)
+        self._line.truncate()
+        self._spool.write(data)
+        self._spool_size += len(data)
+
+    def add(self, row: Dict[str, object]) -> None:
+        if self._writer is None:
+            self.out_path.parent.mkdir(parents=True, exist_ok=True)
+            self._columns = [c for c in row if c != "rank"]
+            self._spool = self._spool_path.open("wb")
+            self._writer = csv.DictWriter(self._line, fieldnames=self._columns, extrasaction="ignore")
+            self._writer.writeheader()
+            self._write_line()
+        self._writer.writerow(row)
+        self._offsets.append(self._spool_size)
+        self._write_line()
+        self._scores.append(float(row["score"]))
+
+    def add_many(self, rows: Iterable[Dict[str, object]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def _rank_order(self):
+        import numpy as np
+
+        # Row indices from rank 1 (highest score) down; ties keep completion
+        # order.
+        order = np.argsort(-np.frombuffer(self._scores, dtype=float), kind="stable")
+        self._scores = array("d")
+        return order
+
+    def _chunks(self, order):
+        import numpy as np
+        import pandas as pd
+
+        if self._spool is None:
+            yield pd.DataFrame(columns=EXPORT_LEAD_COLUMNS)
+            return
+        starts = np.frombuffer(self._offsets, dtype=np.int64)
+        ends = np.append(starts[1:], self._spool_size)
+        # Text columns are pinned so every chunk keeps the same schema.
+        dtypes = {c: str for c in _TEXT_COLUMNS}
+        with self._spool_path.open("rb") as spool:
+            header = spool.read(int(starts[0]))
+            for first in range(0, len(order), EXPORT_CHUNK_ROWS):
+                parts = [header]
+                for i in order[first:first + EXPORT_CHUNK_ROWS]:
+                    spool.seek(int(starts[i]))
+                    parts.append(spool.read(int(ends[i] - starts[i])))
+                chunk = pd.read_csv(io.BytesIO(b"".join(parts)), dtype=dtypes)
+                chunk.insert(0, "rank", np.arange(first + 1, first + 1 + len(chunk)))
+                lead = [c for c in EXPORT_LEAD_COLUMNS if c in chunk.columns]
+                yield chunk[[*lead, *[c for c in chunk.columns if c not in lead]]]
+
+    def close(self) -> List[Path]:
+        if self._spool is not None:
+            self._spool.close()
+        self.meta["row_count"] = self.row_count
+        order = self._rank_order()
+        try:
+            if self.fmt == "csv":
+                written = self._write_csv(order)
+            elif self.fmt == "parquet":
+                written = self._write_parquet(order)
+            else:
+                written = self._write_xlsx(order)
+        finally:
+            self.discard()
+        return written
+
+    def discard(self) -> None:
+        if self._spool is not None and not self._spool.closed:
+            self._spool.close()
+        self._offsets = array("q")
+        try:
+            self._spool_path.unlink()
+        except OSError:
+            pass
+
+    def _write_meta(self) -> Path:
+        meta_path = self.out_path.with_name(f"{self.out_path.stem}_meta.json")
+        meta_path.write_text(json.dumps(self.meta, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+        return meta_path
+
+    def _write_csv(self, order) -> List[Path]:
+        tmp_path = self.out_path.with_name(f".{self.out_path.name}.tmp")
+        header = True
+        for chunk in self._chunks(order):
+            chunk.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False, encoding="utf-8")
+            header = False
+        os.replace(tmp_path, self.out_path)
+        return [self.out_path, self._write_meta()]
+
+    def _write_parquet(self, order) -> List[Path]:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet 导出需要安装 pyarrow：pip install pyarrow") from exc
+        tmp_path = self.out_path.with_name(f".{self.out_path.name}.tmp")
+        writer = None
+        try:
+            for chunk in self._chunks(order):
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    # Embed the run metadata so the file is self-describing.
+                    schema = table.schema.with_metadata(
+                        {b"lite_run_meta": json.dumps(self.meta, ensure_ascii=False, default=str).encode("utf-8")}
+                    )
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                    table = table.cast(schema)
+                else:
+                    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        os.replace(tmp_path, self.out_path)
+        return [self.out_path, self._write_meta()]
+
+    def _write_xlsx(self, order) -> List[Path]:
+        try:
+            from openpyxl import Workbook
+        except ImportError as exc:
+            raise RuntimeError("Excel 导出需要安装 openpyxl：pip install openpyxl") from exc
+        # write_only keeps a constant footprint: rows are flushed as appended.
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("排名")
+        header = True
+        for chunk in self._chunks(order):
+            if header:
+                sheet.append(list(chunk.columns))
+                header = False
+            for values in chunk.itertuples(index=False, name=None):
+                sheet.append([None if v != v else v for v in values])
+        meta_sheet = workbook.create_sheet("运行信息")
+        for key, value in self.meta.items():
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            meta_sheet.append([key, value])
+        tmp_path = self.out_path.with_name(f".{self.out_path.name}.tmp")
+        workbook.save(tmp_path)
+        os.replace(tmp_path, self.out_path)
+        return [self.out_path]
+
+
+def export_results(
+    rows: Iterable[Dict[str, object]],
+    out_path: Path,
+    fmt: str,
+    meta: Dict[str, object] | None = None,
+) -> List[Path]:
+    with ResultExporter(out_path, fmt, meta) as exporter:
+        exporter.add_many(rows)
+        return exporter.close()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .akshare_provider import AKShareProvider
+from .config import JOB_RETENTION_SECONDS, JOB_WORKERS, MIN_SUCCESS_TO_CHARGE
+from .limits import consume_run
+from .pipeline import PipelineError, RunEvent, RunRequest, RunSummary, run_screening
+from .run_cache import RunCache
+from .tracing import flush_metrics
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    job_id: str
+    request: RunRequest
+    # The session that submitted the job; sessions attached to it through
+    # dedup see the same results but were not charged for them.
+    owner: str = ""
+    status: str = JOB_QUEUED
+    summary: RunSummary | None = None
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    _events: List[RunEvent] = field(default_factory=list, repr=False)
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {JOB_DONE, JOB_FAILED}
+
+    def charged_to(self, session: str) -> bool:
+        return self.summary is not None and self.summary.charged and session == self.owner
+
+    def publish(self, event: RunEvent) -> None:
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def _finish(self, status: str) -> None:
+        with self._cond:
+            self.status = status
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def read(self, cursor: int = 0, timeout: float = 0.0) -> Tuple[List[RunEvent], int]:
+        # Events are kept for the job's lifetime so a reconnecting session can
+        # replay from cursor 0 and then keep streaming from where it is.
+        with self._cond:
+            if cursor >= len(self._events) and not self.finished and timeout > 0:
+                self._cond.wait(timeout)
+            events = self._events[cursor:]
+        return events, cursor + len(events)
+
+
+class JobRunner:
+    def __init__(
+        self,
+        provider: AKShareProvider,
+        max_workers: int = JOB_WORKERS,
+        run_cache: RunCache | None = None,
+    ) -> None:
+        self._provider = provider
+        self._run_cache = run_cache or RunCache(
+            cache_dir=provider.cache_dir / "runs", calendar=provider.calendar
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lite-job")
+        self._jobs: Dict[str, Job] = {}
+        self._active_by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request: RunRequest, owner: str = "") -> str:
+        with self._lock:
+            self._prune_locked()
+            active_id = self._active_by_key.get(request.key())
+            if active_id is not None:
+                active = self._jobs.get(active_id)
+                if active is not None and not active.finished:
+                    return active_id
+            job = Job(job_id=uuid.uuid4().hex[:12], request=request, owner=owner)
+            self._jobs[job.job_id] = job
+            self._active_by_key[request.key()] = job.job_id
+        self._executor.submit(self._run, job)
+        return job.job_id
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune_locked(self) -> None:
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._active_by_key.get(job.request.key()) == job_id:
+                del self._active_by_key[job.request.key()]
+
+    def _replay_cached(self, job: Job, summary: RunSummary) -> None:
+        job.publish(RunEvent("stage", "今日已有相同候选池的体检结果，直接复用"))
+        job.publish(RunEvent("candidates", data={"count": summary.candidate_count}))
+        for result in summary.results:
+            job.publish(RunEvent("result", data=result))
+        job.publish(
+            RunEvent(
+                "progress",
+                data={"processed": summary.attempted_count, "expected": summary.attempted_count},
+            )
+        )
+
+    def _run(self, job: Job) -> None:
+        job.status = JOB_RUNNING
+        try:
+            summary = self._run_cache.get(job.request)
+            if summary is not None:
+                self._replay_cached(job, summary)
+            else:
+                summary = run_screening(self._provider, job.request, emit=job.publish)
+                self._run_cache.put(job.request, summary)
+            if summary.success_count >= MIN_SUCCESS_TO_CHARGE:
+                consume_run()
+                summary.charged = True
+            job.summary = summary
+            job._finish(JOB_DONE)
+        except PipelineError as exc:
+            job.error = str(exc)
+            job._finish(JOB_FAILED)
+        except Exception as exc:  # pragma: no cover
+            job.error = f"处理异常：{exc}"
+            job._finish(JOB_FAILED)
+        finally:
+            flush_metrics()
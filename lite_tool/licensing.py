@@ -6,21 +6,26 @@ import json
 import os
 import platform
 import sys
+import threading
+import time
 import uuid
 from dataclasses import dataclass
 from datetime import date
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import TYPE_CHECKING, Dict, Tuple
 
-from cryptography.exceptions import InvalidSignature
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric.ed25519 import (
-    Ed25519PrivateKey,
-    Ed25519PublicKey,
-)
+from .profiling import timed_import
+
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+        Ed25519PrivateKey,
+        Ed25519PublicKey,
+    )
 
 
 DEFAULT_PRODUCT = "buffett_lite"
+LICENSE_RECHECK_SECONDS = 60
 
 
 class LicenseError(RuntimeError):
@@ -42,6 +47,7 @@ def _canonical_payload(payload: Dict[str, object]) -> bytes:
     )
 
 
+@lru_cache(maxsize=1)
 def get_machine_code() -> str:
     raw = f"{platform.system()}|{platform.node()}|{uuid.getnode()}"
     digest = hashlib.sha256(raw.encode("utf-8")).hexdigest().upper()
@@ -100,10 +106,21 @@ def resolve_license_path() -> Path | None:
     return None
 
 
+def _import_crypto():
+    # cryptography is only needed once a license is actually verified or
+    # signed, so open-trial pages never pay for loading it.
+    with timed_import("cryptography"):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+    return InvalidSignature, serialization, ed25519
+
+
 def load_public_key(path: Path) -> Ed25519PublicKey:
+    _, serialization, ed25519 = _import_crypto()
     pem = path.read_bytes()
     pub = serialization.load_pem_public_key(pem)
-    if not isinstance(pub, Ed25519PublicKey):
+    if not isinstance(pub, ed25519.Ed25519PublicKey):
         raise LicenseError("public_key.pem 不是 Ed25519 公钥。")
     return pub
 
@@ -129,6 +146,7 @@ def verify_license_content(
     if licensed_machine and licensed_machine != machine_code.upper():
         raise LicenseError("授权机器码不匹配。")
 
+    InvalidSignature, _, _ = _import_crypto()
     signature = base64.urlsafe_b64decode(signature_b64.encode("utf-8"))
     message = _canonical_payload(payload)
     try:
@@ -165,10 +183,66 @@ def verify_license_file(
     return verify_license_content(payload, signature, public_key, machine)
 
 
+@dataclass(frozen=True)
+class LicenseCheck:
+    public_key_path: Path | None
+    license_path: Path | None
+    info: LicenseInfo | None = None
+    error: str = ""
+
+
+def _file_stamp(path: Path | None) -> Tuple[str, float]:
+    if path is None:
+        return ("", 0.0)
+    try:
+        return (str(path), path.stat().st_mtime)
+    except OSError:
+        return (str(path), -1.0)
+
+
+_check_lock = threading.Lock()
+_check_memo: Dict[str, object] = {}
+
+
+def check_license_cached(machine_code: str | None = None) -> LicenseCheck:
+    # Streamlit re-runs the page on every widget interaction. The full check
+    # (path lookup, JSON parse, Ed25519 verify) is reused until the date rolls
+    # over or either file changes; file mtimes are looked at no more than
+    # once per LICENSE_RECHECK_SECONDS.
+    machine = (machine_code or get_machine_code()).upper()
+    now = time.monotonic()
+    today = date.today().isoformat()
+    with _check_lock:
+        memo = dict(_check_memo)
+    if memo and memo["machine"] == machine and memo["date"] == today:
+        if now - float(memo["checked_at"]) < LICENSE_RECHECK_SECONDS:
+            return memo["result"]  # type: ignore[return-value]
+
+    key_path = resolve_public_key_path()
+    lic_path = resolve_license_path()
+    stamps = (_file_stamp(key_path), _file_stamp(lic_path))
+    if memo and memo["machine"] == machine and memo["date"] == today and memo["stamps"] == stamps:
+        result = memo["result"]
+    elif key_path is None or lic_path is None:
+        result = LicenseCheck(public_key_path=key_path, license_path=lic_path)
+    else:
+        try:
+            info = verify_license_file(lic_path, key_path, machine_code=machine)
+            result = LicenseCheck(key_path, lic_path, info=info)
+        except LicenseError as exc:
+            result = LicenseCheck(key_path, lic_path, error=str(exc))
+    with _check_lock:
+        _check_memo.update(
+            {"machine": machine, "date": today, "stamps": stamps, "checked_at": now, "result": result}
+        )
+    return result  # type: ignore[return-value]
+
+
 def load_private_key(path: Path) -> Ed25519PrivateKey:
+    _, serialization, ed25519 = _import_crypto()
     pem = path.read_bytes()
     key = serialization.load_pem_private_key(pem, password=None)
-    if not isinstance(key, Ed25519PrivateKey):
+    if not isinstance(key, ed25519.Ed25519PrivateKey):
         raise LicenseError("私钥不是 Ed25519。")
     return key
 
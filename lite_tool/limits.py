@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import threading
 from datetime import date
 from pathlib import Path
 from typing import Dict
@@ -8,6 +9,14 @@ from typing import Dict
 from .config import MAX_DAILY_RUNS, STATE_DIR, STATE_FILE
 
 
+# In-process copy of today's quota state. Reads (every Streamlit rerun) are
+# served from memory; writes go through to STATE_FILE, and consume_run
+# re-reads the file first so another process's runs are not lost.
+_state_lock = threading.Lock()
+_state_memo: Dict[str, object] = {}
+_consume_lock = threading.Lock()
+
+
 def _default_state(today: str) -> Dict[str, object]:
     return {"date": today, "count": 0}
 
@@ -22,8 +31,7 @@ def _load_raw_state(path: Path) -> Dict[str, object]:
             return {}
 
 
-def get_today_state() -> Dict[str, object]:
-    today = date.today().isoformat()
+def _read_today_state(today: str) -> Dict[str, object]:
     raw = _load_raw_state(STATE_FILE)
     if raw.get("date") != today:
         return _default_state(today)
@@ -35,10 +43,25 @@ def get_today_state() -> Dict[str, object]:
     return {"date": today, "count": count}
 
 
+def get_today_state() -> Dict[str, object]:
+    today = date.today().isoformat()
+    with _state_lock:
+        if _state_memo.get("date") == today:
+            return dict(_state_memo)
+    state = _read_today_state(today)
+    with _state_lock:
+        _state_memo.clear()
+        _state_memo.update(state)
+    return dict(state)
+
+
 def save_state(state: Dict[str, object]) -> None:
     STATE_DIR.mkdir(parents=True, exist_ok=True)
     with STATE_FILE.open("w", encoding="utf-8") as f:
         json.dump(state, f, ensure_ascii=False, indent=2)
+    with _state_lock:
+        _state_memo.clear()
+        _state_memo.update(state)
 
 
 def runs_remaining() -> int:
@@ -47,8 +70,9 @@ def runs_remaining() -> int:
 
 
 def consume_run() -> int:
-    state = get_today_state()
-    state["count"] = min(MAX_DAILY_RUNS, int(state["count"]) + 1)
-    save_state(state)
+    with _consume_lock:
+        state = _read_today_state(date.today().isoformat())
+        state["count"] = min(MAX_DAILY_RUNS, int(state["count"]) + 1)
+        save_state(state)
     return int(state["count"])
 
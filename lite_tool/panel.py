@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .akshare_provider import DATA_ERROR, AKShareProvider, Candidate
+from .config import PANEL_CHUNKS_PER_PROCESS
+from .pipeline import ScoredCandidate
+from .resample import DAILY
+from .scoring import ScoreResult, evaluate_candidate
+from .tracing import bind, span
+
+# Per-symbol fundamentals stored next to the closes (NaN = not available).
+PANEL_FUNDAMENTALS = ("pe", "pb", "pe_percentile")
+
+
+@dataclass(frozen=True)
+class PanelSpec:
+    # Everything a worker needs to attach: the block name and the sizes that
+    # fix the layout (offsets int64[n+1] | closes float64[m] | fundamentals
+    # float64[n, len(PANEL_FUNDAMENTALS)]).
+    name: str
+    symbols: int
+    values: int
+
+    @property
+    def nbytes(self) -> int:
+        return 8 * ((self.symbols + 1) + self.values + self.symbols * len(PANEL_FUNDAMENTALS))
+
+
+def _layout(buf, spec: PanelSpec) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    n, m = spec.symbols, spec.values
+    offsets = np.ndarray((n + 1,), dtype=np.int64, buffer=buf)
+    closes = np.ndarray((m,), dtype=np.float64, buffer=buf, offset=8 * (n + 1))
+    fundamentals = np.ndarray(
+        (n, len(PANEL_FUNDAMENTALS)),
+        dtype=np.float64,
+        buffer=buf,
+        offset=8 * (n + 1 + m),
+    )
+    return offsets, closes, fundamentals
+
+
+class PricePanel:
+    # The close series of many symbols packed end to end in one
+    # multiprocessing.shared_memory block. Scoring workers attach it by name
+    # and take NumPy views, so only index ranges cross the process boundary
+    # instead of a pickled DataFrame per symbol. The creating process owns the
+    # block and unlinks it on close().
+    def __init__(self, spec: PanelSpec, shm: SharedMemory, owner: bool) -> None:
+        self.spec = spec
+        self._shm = shm
+        self._owner = owner
+        self.offsets, self.closes, self.fundamentals = _layout(shm.buf, spec)
+
+    @classmethod
+    def create(
+        cls,
+        series: Sequence[np.ndarray],
+        fundamentals: Sequence[Mapping[str, float]] | None = None,
+    ) -> "PricePanel":
+        lengths = np.fromiter((len(s) for s in series), dtype=np.int64, count=len(series))
+        spec = PanelSpec(name="", symbols=len(series), values=int(lengths.sum()))
+        shm = SharedMemory(create=True, size=max(spec.nbytes, 1))
+        spec = PanelSpec(name=shm.name, symbols=spec.symbols, values=spec.values)
+        panel = cls(spec, shm, owner=True)
+        panel.offsets[0] = 0
+        np.cumsum(lengths, out=panel.offsets[1:])
+        for i, values in enumerate(series):
+            panel.closes[panel.offsets[i]:panel.offsets[i + 1]] = values
+        panel.fundamentals[:] = np.nan
+        for i, row in enumerate(fundamentals or ()):
+            for j, key in enumerate(PANEL_FUNDAMENTALS):
+                if row.get(key) is not None:
+                    panel.fundamentals[i, j] = row[key]
+        return panel
+
+    @classmethod
+    def attach(cls, spec: PanelSpec) -> "PricePanel":
+        return cls(spec, SharedMemory(name=spec.name), owner=False)
+
+    def __enter__(self) -> "PricePanel":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.spec.symbols
+
+    def close_view(self, index: int) -> np.ndarray:
+        return self.closes[self.offsets[index]:self.offsets[index + 1]]
+
+    def fundamentals_of(self, index: int) -> dict:
+        row = self.fundamentals[index]
+        return {key: float(row[j]) for j, key in enumerate(PANEL_FUNDAMENTALS) if not math.isnan(row[j])}
+
+    def close(self) -> None:
+        # Views must go before the buffer can be released.
+        self.offsets = self.closes = self.fundamentals = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+# Worker-process state, set once per worker by _attach_worker.
+_WORKER_PANEL: PricePanel | None = None
+_WORKER_CODES: Tuple[str, ...] = ()
+
+
+def _attach_worker(spec: PanelSpec, codes: Tuple[str, ...]) -> None:
+    global _WORKER_PANEL, _WORKER_CODES
+    _WORKER_PANEL = PricePanel.attach(spec)
+    _WORKER_CODES = codes
+
+
+def score_panel_range(
+    start: int,
+    stop: int,
+    period: str,
+) -> List[Tuple[int, ScoreResult | None, str | None, float]]:
+    # Runs in a worker: scores symbols [start, stop) straight from the shared
+    # views. Names are filled in by the parent.
+    panel = _WORKER_PANEL
+    out = []
+    for i in range(start, stop):
+        started = time.perf_counter()
+        hist = pd.DataFrame({"close": panel.close_view(i)}, copy=False)
+        try:
+            result = evaluate_candidate(_WORKER_CODES[i], "", hist, period, panel.fundamentals_of(i))
+            out.append((i, result, None, time.perf_counter() - started))
+        except Exception as exc:
+            out.append((i, None, str(exc), time.perf_counter() - started))
+    return out
+
+
+def panel_ranges(symbols: int, processes: int) -> List[Tuple[int, int]]:
+    # A few chunks per process so an unlucky slow chunk does not idle the rest.
+    chunk = max(1, math.ceil(symbols / (max(processes, 1) * PANEL_CHUNKS_PER_PROCESS)))
+    return [(start, min(start + chunk, symbols)) for start in range(0, symbols, chunk)]
+
+
+def score_candidates_in_processes(
+    provider: AKShareProvider,
+    candidates: Iterable[Candidate],
+    processes: int,
+    fetch_workers: int = 4,
+    deadline: float | None = None,
+    period: str = DAILY,
+) -> Iterator[ScoredCandidate]:
+    # Same contract as pipeline.score_candidates (completion order, fetch
+    # failures yielded as items, candidates not started before `deadline`
+    # skipped), but histories are fetched first with threads, packed into a
+    # PricePanel and scored by `processes` worker processes.
+    candidates = list(candidates)
+    fetched: List[Tuple[Candidate, np.ndarray, dict, float]] = []
+
+    def fetch(cand: Candidate):
+        if deadline is not None and time.time() > deadline:
+            return None
+        started = time.perf_counter()
+        hist, err_type, err_text = provider.get_history_safe(cand.code, period)
+        elapsed = time.perf_counter() - started
+        if hist is None:
+            return ScoredCandidate(
+                candidate=cand, error_type=err_type, error=err_text, stage="fetch", fetch_seconds=elapsed
+            )
+        closes = pd.to_numeric(hist["close"], errors="coerce").dropna().to_numpy(dtype=np.float64)
+        return cand, closes, provider.valuation_inputs(cand.code), elapsed
+
+    with ThreadPoolExecutor(max_workers=max(fetch_workers, 1), thread_name_prefix="lite-fetch") as pool:
+        futures = [pool.submit(bind(fetch), cand) for cand in candidates]
+        for future in as_completed(futures):
+            outcome = future.result()
+            if isinstance(outcome, ScoredCandidate):
+                yield outcome
+            elif outcome is not None:
+                fetched.append(outcome)
+    if not fetched:
+        return
+
+    with span("panel.build", symbols=len(fetched)) as s:
+        panel = PricePanel.create([f[1] for f in fetched], [f[2] for f in fetched])
+        s.set(bytes=panel.spec.nbytes)
+    codes = tuple(f[0].code for f in fetched)
+    with panel, ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_attach_worker,
+        initargs=(panel.spec, codes),
+    ) as pool:
+        futures = [
+            pool.submit(score_panel_range, start, stop, period)
+            for start, stop in panel_ranges(len(fetched), processes)
+        ]
+        for future in as_completed(futures):
+            for i, result, error, seconds in future.result():
+                cand, _, _, fetch_seconds = fetched[i]
+                item = ScoredCandidate(candidate=cand, fetch_seconds=fetch_seconds, score_seconds=seconds)
+                if result is None:
+                    item.error_type, item.error, item.stage = DATA_ERROR, error, "score"
+                else:
+                    result.name = cand.name
+                    item.result = result
+                yield item
@@ -0,0 +1,567 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from .akshare_provider import (
+    BAR_APPENDED,
+    BAR_PATCHED,
+    CACHE_COLD,
+    CACHE_HIT,
+    CACHE_STALE,
+    DATA_ERROR,
+    NETWORK_ERROR,
+    AKShareProvider,
+    Candidate,
+    DataProviderError,
+)
+from .config import (
+    AUTO_FILL_POOL_SIZE,
+    AUTO_FILL_TARGET,
+    EARLY_STOP_STABLE_ROUNDS,
+    MAX_UNIVERSE_SIZE,
+    MIN_SUCCESS_TO_CHARGE,
+    RUNTIME_BUDGET_SECONDS,
+    SPECULATIVE_FILL_EXTRA,
+    SPECULATIVE_MIN_OBSERVED,
+    SPECULATIVE_FILL_WORKERS,
+    SPOT_MEMO_TTL_SECONDS,
+)
+from .resample import DAILY
+from .scoring import ScoreResult, evaluate_candidate
+from .tracing import bind, collect, span, stage_breakdown
+from .trading_calendar import TradingCalendar, default_calendar
+
+
+MANUAL_MODE = "manual"
+AUTO_MODE = "auto"
+
+
+class PipelineError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class RunRequest:
+    mode: str
+    codes: Tuple[str, ...] = ()
+    auto_limit: int = 20
+    early_stop: bool = False
+
+    def key(self) -> str:
+        suffix = ":early" if self.early_stop else ""
+        if self.mode == MANUAL_MODE:
+            return f"{MANUAL_MODE}:{','.join(self.codes)}{suffix}"
+        return f"{AUTO_MODE}:{self.auto_limit}{suffix}"
+
+
+@dataclass(frozen=True)
+class RunEvent:
+    kind: str
+    message: str = ""
+    data: Dict[str, object] = field(default_factory=dict)
+
+
+@dataclass
+class RunSummary:
+    candidate_count: int = 0
+    results: List[Dict[str, object]] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    network_fail_count: int = 0
+    data_fail_count: int = 0
+    budget_exhausted: bool = False
+    stopped_early: bool = False
+    charged: bool = False
+    stage_timings: List[Dict[str, object]] = field(default_factory=list)
+
+    @property
+    def success_count(self) -> int:
+        return len(self.results)
+
+    @property
+    def failed_count(self) -> int:
+        return len(self.errors)
+
+    @property
+    def attempted_count(self) -> int:
+        return self.success_count + self.failed_count
+
+
+@dataclass
+class ScoredCandidate:
+    candidate: Candidate
+    result: ScoreResult | None = None
+    error_type: str | None = None
+    error: str | None = None
+    stage: str = ""
+    fetch_seconds: float = 0.0
+    score_seconds: float = 0.0
+
+
+EventSink = Callable[[RunEvent], None]
+FetchOutcome = Tuple[object, str | None, str | None]
+
+
+def _discard_event(event: RunEvent) -> None:
+    return None
+
+
+def trading_date_key(calendar: TradingCalendar | None = None) -> str:
+    # The session a run started now is scored on: today as soon as the market
+    # opens (the spot snapshot patches today's bar), otherwise the last one.
+    return (calendar or default_calendar()).snapshot_session(time.time()).isoformat()
+
+
+def snapshot_key(calendar: TradingCalendar | None = None) -> str:
+    # Cache key for anything scored from market data. During trading hours
+    # every new spot snapshot (refetched after SPOT_MEMO_TTL_SECONDS) patches
+    # the last bar again, so results are only reused within one snapshot
+    # window.
+    calendar = calendar or default_calendar()
+    key = trading_date_key(calendar)
+    if calendar.in_trading_hours():
+        key = f"{key}_{int(time.time() // SPOT_MEMO_TTL_SECONDS)}"
+    return key
+
+
+def parse_codes(raw_text: str) -> List[str]:
+    items = re.split(r"[\s,，;；]+", raw_text.strip())
+    codes = []
+    for item in items:
+        if not item:
+            continue
+        code = item.upper().replace(".SH", "").replace(".SZ", "")
+        if code.isdigit() and len(code) == 6:
+            codes.append(code)
+    deduped = []
+    seen = set()
+    for code in codes:
+        if code not in seen:
+            seen.add(code)
+            deduped.append(code)
+    return deduped
+
+
+def top_codes(results: List[Dict[str, object]], n: int = 3) -> Tuple[str, ...]:
+    best = heapq.nlargest(n, results, key=lambda r: float(r["score"]))
+    return tuple(str(r["code"]) for r in best)
+
+
+def prepare_candidates(
+    provider: AKShareProvider,
+    request: RunRequest,
+    emit: EventSink = _discard_event,
+) -> List[Candidate]:
+    if request.mode == MANUAL_MODE:
+        codes = list(request.codes)
+        if not codes:
+            raise PipelineError("请至少输入1个合法A股代码（6位数字）。")
+        if len(codes) > MAX_UNIVERSE_SIZE:
+            emit(RunEvent("notice", f"免费版最多评估{MAX_UNIVERSE_SIZE}只，已自动截断。"))
+            codes = codes[:MAX_UNIVERSE_SIZE]
+        name_map: Dict[str, str] = {}
+        try:
+            name_map = provider.resolve_names(codes)
+        except Exception:  # pragma: no cover
+            name_map = {}
+        unresolved = [code for code in codes if code not in name_map]
+        if unresolved:
+            emit(
+                RunEvent(
+                    "notice",
+                    f"有 {len(unresolved)} 只股票名称暂未解析，已用代码展示，不影响体检结果。",
+                )
+            )
+        candidates = [Candidate(code=c, name=name_map.get(c, c)) for c in codes]
+    else:
+        emit(RunEvent("stage", "正在获取热门候选股票，首次可能需要30-60秒，请稍等..."))
+        try:
+            candidates = provider.get_auto_candidates(limit=request.auto_limit)
+        except DataProviderError as exc:
+            raise PipelineError("暂时没拿到自动候选池数据，请稍后重试。") from exc
+        except Exception as exc:  # pragma: no cover
+            raise PipelineError("自动候选池加载失败，请稍后重试。") from exc
+
+    if not candidates:
+        raise PipelineError("本次未获得可用候选池，请稍后重试。")
+    return candidates
+
+
+def fetch_and_score(
+    provider: AKShareProvider,
+    cand: Candidate,
+    fetched: FetchOutcome | None = None,
+    period: str = DAILY,
+) -> ScoredCandidate:
+    fetch_started = time.perf_counter()
+    if fetched is None:
+        fetched = provider.get_history_safe(cand.code, period)
+    hist, err_type, err_text = fetched
+    item = ScoredCandidate(candidate=cand, fetch_seconds=time.perf_counter() - fetch_started)
+    if hist is None:
+        item.error_type, item.error, item.stage = err_type, err_text, "fetch"
+        return item
+    fundamentals = provider.valuation_inputs(cand.code)
+    score_started = time.perf_counter()
+    with span("score.evaluate", code=cand.code, rows=len(hist)) as s:
+        try:
+            item.result = evaluate_candidate(cand.code, cand.name, hist, period, fundamentals)
+        except Exception as exc:
+            item.error_type, item.error, item.stage = DATA_ERROR, str(exc), "score"
+            s.set(error=type(exc).__name__)
+    item.score_seconds = time.perf_counter() - score_started
+    return item
+
+
+def score_candidates(
+    provider: AKShareProvider,
+    candidates: Iterable[Candidate],
+    max_workers: int = 1,
+    deadline: float | None = None,
+    period: str = DAILY,
+) -> Iterator[ScoredCandidate]:
+    # Yields in completion order. Candidates not started before `deadline`
+    # (a time.time() value) are skipped rather than yielded.
+    if max_workers <= 1:
+        for cand in candidates:
+            if deadline is not None and time.time() > deadline:
+                return
+            yield fetch_and_score(provider, cand, period=period)
+        return
+
+    def task(cand: Candidate) -> ScoredCandidate | None:
+        if deadline is not None and time.time() > deadline:
+            return None
+        return fetch_and_score(provider, cand, period=period)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lite-fetch") as pool:
+        futures = [pool.submit(bind(task), cand) for cand in candidates]
+        try:
+            for future in as_completed(futures):
+                item = future.result()
+                if item is not None:
+                    yield item
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def schedule_candidates(
+    provider: AKShareProvider,
+    candidates: List[Candidate],
+) -> Tuple[List[Candidate], Dict[str, str]]:
+    # Cache hits score instantly, so they go first; the runtime budget is then
+    # spent on network fetches (stale before cold). Within each tier the
+    # incoming order is kept: turnover rank for the auto universe, the
+    # user's own order for manual codes.
+    tiers: Dict[str, List[Candidate]] = {CACHE_HIT: [], CACHE_STALE: [], CACHE_COLD: []}
+    status_map: Dict[str, str] = {}
+    for cand in candidates:
+        try:
+            status = provider.history_cache_status(cand.code)
+        except Exception:
+            status = CACHE_COLD
+        status_map[cand.code] = status
+        tiers[status].append(cand)
+    ordered = tiers[CACHE_HIT] + tiers[CACHE_STALE] + tiers[CACHE_COLD]
+    return ordered, status_map
+
+
+def refresh_latest_bars(
+    provider: AKShareProvider,
+    candidates: List[Candidate],
+    cache_status: Dict[str, str],
+) -> int:
+    # Outdated caches, and during trading hours current ones too, get their
+    # latest bar from a single spot snapshot. Histories the snapshot cannot
+    # bring up to date stay stale and are downloaded as usual.
+    in_session = provider.calendar.in_trading_hours()
+    codes = [
+        c.code
+        for c in candidates
+        if cache_status.get(c.code) == CACHE_STALE
+        or (in_session and cache_status.get(c.code) == CACHE_HIT)
+    ]
+    if not codes:
+        return 0
+    try:
+        statuses = provider.refresh_from_spot(codes)
+    except Exception:
+        return 0
+    return sum(1 for status in statuses.values() if status in (BAR_PATCHED, BAR_APPENDED))
+
+
+class SupplementPrefetcher:
+    # Fetches auto-fill candidates in the background while manual codes are
+    # still being processed. ensure(n) keeps the first n supplement candidates
+    # in flight; close() cancels whatever has not started, and fetches that
+    # already ran stay in the provider's cache for later runs.
+    def __init__(
+        self,
+        provider: AKShareProvider,
+        exclude: Iterable[str],
+        max_workers: int = SPECULATIVE_FILL_WORKERS,
+    ) -> None:
+        self._provider = provider
+        self._exclude = set(exclude)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lite-fill")
+        self._lock = threading.Lock()
+        self._pool_future: Future | None = None
+        self._pool: List[Candidate] | None = None
+        self._wanted = 0
+        self._futures: Dict[str, Future] = {}
+
+    @property
+    def started(self) -> bool:
+        return self._pool_future is not None
+
+    def _load_pool(self) -> List[Candidate]:
+        try:
+            supplement = self._provider.get_auto_candidates(
+                limit=min(MAX_UNIVERSE_SIZE, AUTO_FILL_POOL_SIZE)
+            )
+        except Exception:
+            supplement = []
+        ordered, _ = schedule_candidates(
+            self._provider, [c for c in supplement if c.code not in self._exclude]
+        )
+        with self._lock:
+            self._pool = ordered
+        self._submit_wanted()
+        return ordered
+
+    def _submit_wanted(self) -> None:
+        with self._lock:
+            if self._pool is None:
+                return
+            for cand in self._pool[: self._wanted]:
+                if cand.code not in self._futures:
+                    self._futures[cand.code] = self._executor.submit(
+                        bind(self._provider.get_history_safe), cand.code
+                    )
+
+    def ensure(self, count: int) -> None:
+        with self._lock:
+            self._wanted = max(self._wanted, count)
+            if self._pool_future is None:
+                self._pool_future = self._executor.submit(bind(self._load_pool))
+        self._submit_wanted()
+
+    def candidates(self, timeout: float | None = None) -> List[Candidate]:
+        # Raises concurrent.futures.TimeoutError if the pool is not loaded
+        # within `timeout` seconds.
+        if self._pool_future is None:
+            self.ensure(0)
+        assert self._pool_future is not None
+        return self._pool_future.result(timeout=timeout)
+
+    def ready(self, code: str) -> bool:
+        with self._lock:
+            future = self._futures.get(code)
+        return future is not None and future.done()
+
+    def outcome(self, code: str, timeout: float | None = None) -> FetchOutcome | None:
+        with self._lock:
+            future = self._futures.get(code)
+        if future is None:
+            return None
+        return future.result(timeout=timeout)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def predicted_shortfall(success_count: int, processed_count: int, remaining_count: int) -> int:
+    # Until a few manual codes have been tried, only a certain shortfall (too
+    # few codes even if all succeed) triggers speculation.
+    if processed_count < SPECULATIVE_MIN_OBSERVED:
+        success_rate = 1.0
+    else:
+        success_rate = success_count / processed_count
+    expected = success_count + remaining_count * success_rate
+    return max(0, math.ceil(AUTO_FILL_TARGET - expected))
+
+
+def _score_candidate(
+    provider: AKShareProvider,
+    cand: Candidate,
+    summary: RunSummary,
+    emit: EventSink,
+    label: str = "",
+    fetched: FetchOutcome | None = None,
+) -> bool:
+    emit(RunEvent("symbol", data={"code": cand.code, "name": cand.name, "status": "loading"}))
+    item = fetch_and_score(provider, cand, fetched)
+    if item.result is None:
+        if item.error_type == NETWORK_ERROR:
+            summary.network_fail_count += 1
+        else:
+            summary.data_fail_count += 1
+        prefix = "评分" if item.stage == "score" else ""
+        summary.errors.append(f"{cand.code} {label}{prefix}失败: {item.error}")
+        emit(RunEvent("symbol", data={"code": cand.code, "name": cand.name, "status": "failed"}))
+        return False
+    result = item.result.to_dict()
+    summary.results.append(result)
+    emit(RunEvent("symbol", data={"code": cand.code, "name": cand.name, "status": "scored"}))
+    emit(RunEvent("result", data=result))
+    return True
+
+
+def run_screening(
+    provider: AKShareProvider,
+    request: RunRequest,
+    emit: EventSink = _discard_event,
+    budget_seconds: float = RUNTIME_BUDGET_SECONDS,
+) -> RunSummary:
+    with collect() as spans:
+        with span("pipeline.run", mode=request.mode):
+            summary = _run_screening(provider, request, emit, budget_seconds)
+        summary.stage_timings = stage_breakdown(spans)
+    return summary
+
+
+def _run_screening(
+    provider: AKShareProvider,
+    request: RunRequest,
+    emit: EventSink,
+    budget_seconds: float,
+) -> RunSummary:
+    started_at = time.time()
+    emit(RunEvent("stage", "步骤1/3：准备候选池"))
+    with span("pipeline.prepare", mode=request.mode):
+        candidates = prepare_candidates(provider, request, emit)
+
+    summary = RunSummary(candidate_count=len(candidates))
+    emit(RunEvent("candidates", data={"count": len(candidates)}))
+    emit(RunEvent("stage", "步骤2/3：计算体检结果"))
+    with span("pipeline.schedule", candidates=len(candidates)):
+        candidates, cache_status = schedule_candidates(provider, candidates)
+        refreshed = refresh_latest_bars(provider, candidates, cache_status)
+        if refreshed:
+            candidates, cache_status = schedule_candidates(provider, candidates)
+    if refreshed:
+        emit(RunEvent("stage", f"已用一次行情快照更新 {refreshed} 只股票的最新行情"))
+    hit_count = sum(1 for status in cache_status.values() if status == CACHE_HIT)
+    if hit_count:
+        emit(RunEvent("stage", f"已有本地缓存 {hit_count} 只，优先评估"))
+
+    prefetcher: SupplementPrefetcher | None = None
+    if request.mode == MANUAL_MODE:
+        prefetcher = SupplementPrefetcher(provider, exclude=[c.code for c in candidates])
+    try:
+        _run_candidates(
+            provider,
+            request,
+            candidates,
+            cache_status,
+            summary,
+            emit,
+            started_at,
+            budget_seconds,
+            prefetcher,
+        )
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+    return summary
+
+
+def _maybe_speculate(
+    prefetcher: SupplementPrefetcher | None,
+    summary: RunSummary,
+    processed_count: int,
+    remaining_count: int,
+    emit: EventSink,
+) -> None:
+    if prefetcher is None:
+        return
+    shortfall = predicted_shortfall(summary.success_count, processed_count, remaining_count)
+    if shortfall <= 0:
+        return
+    if not prefetcher.started:
+        emit(RunEvent("stage", "自选代码预计不足3只有效结果，已提前并行准备补位候选"))
+    prefetcher.ensure(shortfall + SPECULATIVE_FILL_EXTRA)
+
+
+def _run_candidates(
+    provider: AKShareProvider,
+    request: RunRequest,
+    candidates: List[Candidate],
+    cache_status: Dict[str, str],
+    summary: RunSummary,
+    emit: EventSink,
+    started_at: float,
+    budget_seconds: float,
+    prefetcher: SupplementPrefetcher | None,
+) -> None:
+    processed_count = 0
+    expected_count = len(candidates)
+    leaders: Tuple[str, ...] = ()
+    stable_rounds = 0
+    _maybe_speculate(prefetcher, summary, processed_count, len(candidates), emit)
+    for cand in candidates:
+        is_hit = cache_status.get(cand.code) == CACHE_HIT
+        if not is_hit and time.time() - started_at > budget_seconds:
+            summary.budget_exhausted = True
+            break
+        processed_count += 1
+        _score_candidate(provider, cand, summary, emit)
+        emit(RunEvent("progress", data={"processed": processed_count, "expected": expected_count}))
+        _maybe_speculate(prefetcher, summary, processed_count, len(candidates) - processed_count, emit)
+
+        current = top_codes(summary.results)
+        stable_rounds = stable_rounds + 1 if current == leaders else 0
+        leaders = current
+        if (
+            request.early_stop
+            and processed_count < expected_count
+            and summary.success_count >= MIN_SUCCESS_TO_CHARGE
+            and stable_rounds >= EARLY_STOP_STABLE_ROUNDS
+        ):
+            summary.stopped_early = True
+            emit(RunEvent("notice", f"Top 3 已连续 {stable_rounds} 只未变化，提前结束本次运行。"))
+            break
+
+    if (
+        prefetcher is None
+        or summary.success_count >= AUTO_FILL_TARGET
+        or summary.budget_exhausted
+    ):
+        return
+
+    emit(RunEvent("stage", "步骤2/3：自选结果不足3只，正在自动补位"))
+    needed = AUTO_FILL_TARGET - summary.success_count
+    prefetcher.ensure(needed + SPECULATIVE_FILL_EXTRA)
+    remaining_budget = budget_seconds - (time.time() - started_at)
+    try:
+        supplement_candidates = prefetcher.candidates(timeout=max(remaining_budget, 0.0))
+    except FutureTimeoutError:
+        # The auto pool did not load within the budget: no supplement.
+        summary.budget_exhausted = True
+        return
+    expected_count += min(len(supplement_candidates), max(needed, 0))
+    for index, cand in enumerate(supplement_candidates):
+        if needed <= 0:
+            break
+        prefetcher.ensure(index + needed + SPECULATIVE_FILL_EXTRA)
+        remaining_budget = budget_seconds - (time.time() - started_at)
+        if not prefetcher.ready(cand.code) and remaining_budget <= 0:
+            summary.budget_exhausted = True
+            break
+        try:
+            fetched = prefetcher.outcome(cand.code, timeout=max(remaining_budget, 0.0))
+        except FutureTimeoutError:
+            summary.budget_exhausted = True
+            break
+        processed_count += 1
+        if _score_candidate(provider, cand, summary, emit, label="补位", fetched=fetched):
+            needed -= 1
+        emit(RunEvent("progress", data={"processed": processed_count, "expected": expected_count}))
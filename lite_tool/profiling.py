@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+STARTUP_PROFILE_ENV = "LITE_PROFILE_STARTUP"
+STARTUP_REPORT_ENV = "LITE_STARTUP_REPORT"
+PROCESS_STARTED_ENV = "LITE_PROCESS_STARTED"
+DEFAULT_PROFILE_TARGETS = [
+    "streamlit",
+    "pandas",
+    "akshare",
+    "cryptography.hazmat.primitives.asymmetric.ed25519",
+    "lite_tool.licensing",
+    "lite_tool.akshare_provider",
+    "lite_tool.jobs",
+]
+
+_PROCESS_STARTED = time.perf_counter()
+_lock = threading.Lock()
+_import_seconds: Dict[str, float] = {}
+_marks_written: set = set()
+_IMPORTTIME_LINE = re.compile(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def profile_enabled() -> bool:
+    return os.getenv(STARTUP_PROFILE_ENV, "0").strip().lower() in {"1", "true", "yes"}
+
+
+@contextmanager
+def timed_import(name: str) -> Iterator[None]:
+    # Wraps a deferred import site; only the first (real) load is recorded.
+    already_loaded = name in sys.modules
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if not already_loaded:
+            with _lock:
+                _import_seconds.setdefault(name, time.perf_counter() - started)
+
+
+def recorded_imports() -> List[Tuple[str, float]]:
+    with _lock:
+        return sorted(_import_seconds.items(), key=lambda item: item[1], reverse=True)
+
+
+def seconds_since_start() -> float:
+    return time.perf_counter() - _PROCESS_STARTED
+
+
+def record_startup_mark(label: str) -> None:
+    # Appends "seconds since the launcher started" for `label` to the JSONL
+    # file named by LITE_STARTUP_REPORT, once per process. Both variables are
+    # set by build_executable's cold-start measurement (desktop_entry only
+    # fills in LITE_PROCESS_STARTED when launched otherwise).
+    report_path = os.getenv(STARTUP_REPORT_ENV, "").strip()
+    process_started = os.getenv(PROCESS_STARTED_ENV, "").strip()
+    if not report_path or not process_started:
+        return
+    with _lock:
+        if label in _marks_written:
+            return
+        _marks_written.add(label)
+    record = {"label": label, "seconds": round(time.time() - float(process_started), 3)}
+    try:
+        with open(report_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+def importtime_report(targets: List[str]) -> List[Tuple[str, int, int, int]]:
+    # Runs a fresh interpreter with -X importtime so results are not skewed by
+    # modules this process already loaded. Rows: (module, self_us,
+    # cumulative_us, depth), in import order.
+    code = "; ".join(f"import {t}" for t in targets)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed")
+    rows: List[Tuple[str, int, int, int]] = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Report import time per module for the Lite app's dependencies.")
+    p.add_argument("targets", nargs="*", default=DEFAULT_PROFILE_TARGETS, help="Modules to import")
+    p.add_argument("--top", type=int, default=25, help="Show the N slowest modules by cumulative time")
+    return p.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    for target in args.targets:
+        rows = importtime_report([target])
+        top_level = [r for r in rows if r[0] == target]
+        total_ms = top_level[-1][2] / 1000.0 if top_level else 0.0
+        print(f"{target}: {total_ms:.1f} ms")
+
+    rows = importtime_report(args.targets)
+    print(f"\nSlowest {args.top} modules (cumulative, all targets in one interpreter):")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"{cumulative_us / 1000.0:>14.1f} {self_us / 1000.0:>9.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
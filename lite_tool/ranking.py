@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+import pandas as pd
+
+RANKED_FACTORS = ("score", "valuation_score", "quality_score", "momentum_score", "volatility_score")
+
+
+def rank_within_industry(
+    results: pd.DataFrame,
+    industry_map: Mapping[str, str],
+    factors: Sequence[str] = RANKED_FACTORS,
+) -> pd.DataFrame:
+    # Adds industry-relative columns to a frame of ScoreResult rows:
+    # industry, industry_size, industry_rank (1 = best score in its industry)
+    # and `{factor}_industry_pct` (0-100, higher is better). Every column is
+    # one grouped rank over the whole frame, so thousands of rows take
+    # milliseconds. Codes without an industry get empty industry columns.
+    out = results.copy()
+    out["industry"] = out["code"].astype(str).map(industry_map)
+    factors = [f for f in factors if f in out.columns]
+    groups = out.groupby("industry", sort=False)
+    out["industry_size"] = groups["code"].transform("size")
+    out["industry_rank"] = groups["score"].rank(method="min", ascending=False)
+    pct = groups[factors].rank(method="average", pct=True) * 100.0
+    for factor in factors:
+        out[f"{factor}_industry_pct"] = pct[factor].round(1)
+    return out
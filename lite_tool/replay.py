@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from .akshare_provider import AKShareProvider, UpstreamEmptyError
+
+
+class ReplayProvider(AKShareProvider):
+    # Offline provider that serves recorded data instead of calling akshare.
+    # `replay_dir` holds `spot.csv` (akshare spot column layout) and
+    # `hist_{code}.csv` (akshare or normalized history layout); an existing
+    # CACHE_DIR works as-is for histories; an optional `trade_calendar.csv`
+    # (one ISO date per line) replaces the weekday calendar and an optional
+    # `industry.csv` (code, industry) provides the industry mapping. Caches are
+    # written to a separate directory so replaying never touches the live
+    # cache.
+    def __init__(self, replay_dir: Path, cache_dir: Path | None = None) -> None:
+        self.replay_dir = Path(replay_dir)
+        if cache_dir is None:
+            cache_dir = Path(tempfile.mkdtemp(prefix="lite_replay_"))
+        super().__init__(cache_dir=cache_dir)
+
+    def _download_spot_dataframe(self) -> pd.DataFrame:
+        path = self.replay_dir / "spot.csv"
+        if not path.exists():
+            raise UpstreamEmptyError(f"回放目录缺少行情快照: {path}")
+        return pd.read_csv(path, dtype={"代码": str, "symbol": str})
+
+    def _download_trade_dates(self) -> Iterable[date]:
+        path = self.replay_dir / "trade_calendar.csv"
+        if not path.exists():
+            raise UpstreamEmptyError(f"回放目录缺少交易日历: {path}")
+        return [date.fromisoformat(line.strip()) for line in path.read_text(encoding="utf-8").split()]
+
+    def _download_industry_map(self) -> pd.DataFrame:
+        path = self.replay_dir / "industry.csv"
+        if not path.exists():
+            raise UpstreamEmptyError(f"回放目录缺少行业分类: {path}")
+        return pd.read_csv(path, dtype=str)
+
+    def _download_history(self, code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        path = self.replay_dir / f"hist_{code}.csv"
+        if not path.exists():
+            raise UpstreamEmptyError(f"{code} 回放目录中没有历史数据。")
+        return pd.read_csv(path)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pandas as pd
+
+DAILY = "daily"
+WEEKLY = "weekly"
+MONTHLY = "monthly"
+BAR_PERIODS = (DAILY, WEEKLY, MONTHLY)
+
+# Weeks run Monday-Sunday like akshare's period="weekly"; a bar is dated by
+# the last session it contains, so the current period is a partial bar.
+_PERIOD_FREQ = {WEEKLY: "W-SUN", MONTHLY: "M"}
+
+_AGGREGATIONS = {
+    "date": "last",
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "turnover": "sum",
+}
+
+
+def resample_bars(daily: pd.DataFrame, period: str) -> pd.DataFrame:
+    # Daily bars in get_history's normalized layout -> weekly/monthly bars in
+    # the same layout, so they can go straight into evaluate_candidate.
+    if period == DAILY:
+        return daily
+    if period not in _PERIOD_FREQ:
+        raise ValueError(f"不支持的K线周期: {period}")
+    columns = [c for c in _AGGREGATIONS if c in daily.columns]
+    bars = daily[columns].copy()
+    for col in columns:
+        if col != "date":
+            bars[col] = pd.to_numeric(bars[col], errors="coerce")
+    key = pd.to_datetime(bars["date"], errors="coerce").dt.to_period(_PERIOD_FREQ[period])
+    grouped = bars.groupby(key, sort=True)
+    out = grouped.agg({c: _AGGREGATIONS[c] for c in columns})
+    if "pct_change" in daily.columns:
+        # Compounding the daily changes keeps the first bar's change correct
+        # even though the bar before it is not in the frame.
+        growth = 1.0 + pd.to_numeric(daily["pct_change"], errors="coerce") / 100.0
+        out["pct_change"] = ((growth.groupby(key).prod() - 1.0) * 100.0).round(2)
+    else:
+        out["pct_change"] = (out["close"].pct_change() * 100.0).round(2)
+    out = out.dropna(subset=["close"])
+    return out.reset_index(drop=True)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict
+
+from . import config, scoring
+from .config import CACHE_DIR, DATA_VERSION
+from .pipeline import RunRequest, RunSummary, snapshot_key
+from .trading_calendar import TradingCalendar
+
+
+_SCORING_CONFIG_KEYS = (
+    "AUTO_FILL_POOL_SIZE",
+    "AUTO_FILL_TARGET",
+    "HISTORY_LOOKBACK_DAYS",
+    "MAX_UNIVERSE_SIZE",
+    "MIN_HISTORY_BARS",
+    "EARLY_STOP_STABLE_ROUNDS",
+)
+
+
+def scoring_config_hash() -> str:
+    digest = hashlib.sha256()
+    try:
+        digest.update(Path(scoring.__file__).read_bytes())
+    except OSError:  # pragma: no cover
+        digest.update(scoring.__name__.encode("utf-8"))
+    for key in _SCORING_CONFIG_KEYS:
+        digest.update(f"{key}={getattr(config, key)}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def is_cacheable(summary: RunSummary) -> bool:
+    # Only complete runs are reused: a budget cut or a network failure would
+    # hand the next user a worse result than a fresh run could produce.
+    return (
+        bool(summary.results)
+        and not summary.budget_exhausted
+        and summary.network_fail_count == 0
+    )
+
+
+class RunCache:
+    # Finished run summaries keyed by (universe, snapshot_key, data version,
+    # scoring-config hash); kept in memory and mirrored to CACHE_DIR/runs so a
+    # restarted server still serves today's runs.
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR / "runs",
+        calendar: TradingCalendar | None = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.calendar = calendar
+        self._config_hash = scoring_config_hash()
+        self._memo: Dict[str, Dict[str, object]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, request: RunRequest) -> str:
+        raw = "|".join(
+            [request.key(), snapshot_key(self.calendar), str(DATA_VERSION), self._config_hash]
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"run_{snapshot_key(self.calendar)}_{key}.json"
+
+    def get(self, request: RunRequest) -> RunSummary | None:
+        path = self._path(self.key(request))
+        with self._lock:
+            raw = self._memo.get(path.name)
+        if raw is None:
+            if not path.exists():
+                return None
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                return None
+            with self._lock:
+                self._memo[path.name] = raw
+        summary = RunSummary(**{**raw, "results": list(raw["results"]), "errors": list(raw["errors"])})
+        summary.charged = False
+        return summary
+
+    def put(self, request: RunRequest, summary: RunSummary) -> bool:
+        if not is_cacheable(summary):
+            return False
+        path = self._path(self.key(request))
+        current_prefix = f"run_{snapshot_key(self.calendar)}_"
+        raw = asdict(summary)
+        raw["charged"] = False
+        raw["stage_timings"] = []
+        with self._lock:
+            for name in [n for n in self._memo if not n.startswith(current_prefix)]:
+                del self._memo[name]
+            self._memo[path.name] = raw
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for old in self.cache_dir.glob("run_*.json"):
+                if not old.name.startswith(current_prefix):
+                    old.unlink(missing_ok=True)
+            path.write_text(json.dumps(raw, ensure_ascii=False), encoding="utf-8")
+        except OSError:
+            pass
+        return True
@@ -1,11 +1,27 @@
 from __future__ import annotations
 
 from dataclasses import asdict, dataclass
-from typing import Dict
+from typing import Dict, Mapping
 
 import numpy as np
 import pandas as pd
 
+from .resample import DAILY, MONTHLY, WEEKLY
+
+# Per bar period: bars per year (annualizing volatility), the momentum window
+# (about 60 trading days in every period) and the minimum usable bars. Daily
+# bars cover HISTORY_LOOKBACK_DAYS; weekly/monthly bars are resampled from
+# the whole cached history (HISTORY_STORE_DAYS, about three years), and need
+# about two years of it.
+PERIOD_PARAMS = {
+    DAILY: (252, 60, 80),
+    WEEKLY: (52, 12, 104),
+    MONTHLY: (12, 3, 24),
+}
+# Share of the valuation score taken by the market-wide PE percentile when
+# fundamentals are available; the rest stays price position in the range.
+PE_PERCENTILE_WEIGHT = 0.5
+
 
 def _clip_0_100(value: float) -> float:
     return float(max(0.0, min(100.0, value)))
@@ -17,6 +33,10 @@ def _max_drawdown(closes: pd.Series) -> float:
     return float(dd.min())
 
 
+def _round_or_none(value: float | None, digits: int) -> float | None:
+    return None if value is None else round(float(value), digits)
+
+
 @dataclass
 class ScoreResult:
     code: str
@@ -32,22 +52,32 @@ class ScoreResult:
     annual_volatility: float
     max_drawdown: float
     explanation: str
+    pe: float | None = None
+    pb: float | None = None
+    pe_percentile: float | None = None
 
     def to_dict(self) -> Dict[str, object]:
         return asdict(self)
 
 
-def evaluate_candidate(code: str, name: str, hist: pd.DataFrame) -> ScoreResult:
+def evaluate_candidate(
+    code: str,
+    name: str,
+    hist: pd.DataFrame,
+    period: str = DAILY,
+    fundamentals: Mapping[str, float] | None = None,
+) -> ScoreResult:
+    bars_per_year, momentum_bars, min_bars = PERIOD_PARAMS[period]
     close = pd.to_numeric(hist["close"], errors="coerce").dropna()
-    if len(close) < 80:
+    if len(close) < min_bars:
         raise ValueError(f"{code} 历史收盘数据不足。")
 
     ret = close.pct_change().dropna()
-    annual_vol = float(ret.std(ddof=0) * np.sqrt(252))
+    annual_vol = float(ret.std(ddof=0) * np.sqrt(bars_per_year))
     mdd = _max_drawdown(close)
 
-    if len(close) >= 61:
-        return_60d = float(close.iloc[-1] / close.iloc[-61] - 1.0)
+    if len(close) > momentum_bars:
+        return_60d = float(close.iloc[-1] / close.iloc[-momentum_bars - 1] - 1.0)
     else:
         return_60d = float(close.iloc[-1] / close.iloc[0] - 1.0)
 
@@ -58,6 +88,13 @@ def evaluate_candidate(code: str, name: str, hist: pd.DataFrame) -> ScoreResult:
         position = 0.5
 
     valuation_score = _clip_0_100((1.0 - position) * 100.0)
+    fundamentals = fundamentals or {}
+    pe_percentile = fundamentals.get("pe_percentile")
+    if pe_percentile is not None:
+        valuation_score = _clip_0_100(
+            (1.0 - PE_PERCENTILE_WEIGHT) * valuation_score
+            + PE_PERCENTILE_WEIGHT * (1.0 - pe_percentile) * 100.0
+        )
     quality_score = _clip_0_100((1.0 + mdd) * 100.0)
     momentum_score = _clip_0_100(((return_60d + 0.20) / 0.60) * 100.0)
     volatility_score = _clip_0_100(((0.50 - annual_vol) / 0.50) * 100.0)
@@ -108,5 +145,8 @@ def evaluate_candidate(code: str, name: str, hist: pd.DataFrame) -> ScoreResult:
         annual_volatility=round(annual_vol * 100.0, 2),
         max_drawdown=round(mdd * 100.0, 2),
         explanation=explanation,
+        pe=_round_or_none(fundamentals.get("pe"), 2),
+        pb=_round_or_none(fundamentals.get("pb"), 2),
+        pe_percentile=_round_or_none(None if pe_percentile is None else pe_percentile * 100.0, 1),
     )
 
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from lite_tool.akshare_provider import (
+    NETWORK_ERROR,
+    AKShareProvider,
+    Candidate,
+    DataProviderError,
+    normalize_symbol,
+)
+from lite_tool.config import (
+    SERVICE_CACHE_SIZE,
+    SERVICE_FETCH_WORKERS,
+    SERVICE_MAX_CODES,
+    SERVICE_PORT,
+)
+from lite_tool.pipeline import fetch_and_score, parse_codes, score_candidates, snapshot_key, trading_date_key
+
+
+def _provider_status(error_type: str | None) -> int:
+    # Upstream unreachable or throttled: worth retrying later.
+    return 503 if error_type == NETWORK_ERROR else 502
+
+
+class ServiceError(RuntimeError):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _query_limit(query: Dict[str, List[str]], default: int = 20) -> int:
+    raw = query.get("limit", [str(default)])[0]
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ServiceError(400, f"limit must be an integer: {raw}") from None
+    if limit < 1:
+        raise ServiceError(400, "limit must be positive")
+    return min(limit, SERVICE_MAX_CODES)
+
+
+class ScoringService:
+    def __init__(
+        self,
+        provider: AKShareProvider,
+        max_workers: int = SERVICE_FETCH_WORKERS,
+        cache_size: int = SERVICE_CACHE_SIZE,
+    ) -> None:
+        self.provider = provider
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Tuple[object, ...], Dict[str, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key: Tuple[object, ...]) -> Dict[str, object] | None:
+        with self._lock:
+            payload = self._cache.get(key)
+            if payload is None:
+                return None
+            self._cache.move_to_end(key)
+        return {**payload, "cached": True}
+
+    def _remember(self, key: Tuple[object, ...], payload: Dict[str, object]) -> Dict[str, object]:
+        with self._lock:
+            self._cache[key] = payload
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return {**payload, "cached": False}
+
+    def universe(self, limit: int) -> Dict[str, object]:
+        trading_date = trading_date_key(self.provider.calendar)
+        key = ("universe", limit, snapshot_key(self.provider.calendar))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        candidates = self.provider.get_auto_candidates(limit=limit)
+        payload = {
+            "trading_date": trading_date,
+            "candidates": [{"code": c.code, "name": c.name} for c in candidates],
+        }
+        return self._remember(key, payload)
+
+    def score_symbol(self, symbol: str) -> Dict[str, object]:
+        try:
+            code = normalize_symbol(symbol)
+        except ValueError as exc:
+            raise ServiceError(400, str(exc)) from exc
+        trading_date = trading_date_key(self.provider.calendar)
+        key = ("symbol", code, snapshot_key(self.provider.calendar))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        name = self.provider.resolve_names([code]).get(code, code)
+        # Same path as /score, so valuation includes the PE percentile.
+        item = fetch_and_score(self.provider, Candidate(code=code, name=name))
+        if item.result is None:
+            raise ServiceError(_provider_status(item.error_type), item.error or "")
+        return self._remember(key, {"trading_date": trading_date, "result": item.result.to_dict()})
+
+    def score_codes(self, codes: List[str]) -> Dict[str, object]:
+        if not codes:
+            raise ServiceError(400, "no valid codes")
+        if len(codes) > SERVICE_MAX_CODES:
+            raise ServiceError(400, f"at most {SERVICE_MAX_CODES} codes per request")
+        trading_date = trading_date_key(self.provider.calendar)
+        key = ("score", tuple(sorted(codes)), snapshot_key(self.provider.calendar))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        try:
+            name_map = self.provider.resolve_names(codes)
+        except Exception:
+            name_map = {}
+        candidates = [Candidate(code=c, name=name_map.get(c, c)) for c in codes]
+        results: List[Dict[str, object]] = []
+        errors: List[Dict[str, object]] = []
+        for item in score_candidates(self.provider, candidates, max_workers=self.max_workers):
+            if item.result is None:
+                errors.append(
+                    {"code": item.candidate.code, "error_type": item.error_type, "error": item.error}
+                )
+            else:
+                results.append(item.result.to_dict())
+        results.sort(key=lambda r: float(r["score"]), reverse=True)
+        payload = {"trading_date": trading_date, "results": results, "errors": errors}
+        if any(e["error_type"] == NETWORK_ERROR for e in errors):
+            # Same rule as run_cache.is_cacheable: a transient outage must not
+            # be served for the rest of the day.
+            return {**payload, "cached": False}
+        return self._remember(key, payload)
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests; every response
+    # therefore carries an explicit Content-Length.
+    protocol_version = "HTTP/1.1"
+    server_version = "LiteScoring/1.0"
+
+    @property
+    def service(self) -> ScoringService:
+        return self.server.service  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: object) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict[str, object]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, handler) -> None:
+        try:
+            self._send_json(200, handler())
+        except ServiceError as exc:
+            self._send_json(exc.status, {"error": str(exc)})
+        except DataProviderError as exc:
+            self._send_json(_provider_status(exc.error_type), {"error": str(exc)})
+        except Exception as exc:  # pragma: no cover
+            self._send_json(500, {"error": str(exc)})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip("/")
+        if path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif path == "/universe":
+            self._dispatch(lambda: self.service.universe(_query_limit(query)))
+        elif path == "/score":
+            codes = parse_codes(" ".join(query.get("codes", [])))
+            self._dispatch(lambda: self.service.score_codes(codes))
+        elif path.startswith("/symbols/"):
+            symbol = path[len("/symbols/"):]
+            self._dispatch(lambda: self.service.score_symbol(symbol))
+        else:
+            self._send_json(404, {"error": f"unknown path: {url.path}"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        try:
+            length = int(self.headers.get("Content-Length", "0") or 0)
+        except ValueError:
+            # The body cannot be skipped, so the connection cannot be reused.
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return
+        raw = self.rfile.read(length) if length > 0 else b""
+        if url.path.rstrip("/") != "/score":
+            self._send_json(404, {"error": f"unknown path: {url.path}"})
+            return
+        try:
+            body = json.loads(raw.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            self._send_json(400, {"error": "body must be JSON"})
+            return
+        codes_field = body.get("codes", []) if isinstance(body, dict) else []
+        if isinstance(codes_field, list):
+            codes_field = " ".join(str(c) for c in codes_field)
+        codes = parse_codes(str(codes_field))
+        self._dispatch(lambda: self.service.score_codes(codes))
+
+
+def create_server(
+    service: ScoringService,
+    host: str = "127.0.0.1",
+    port: int = SERVICE_PORT,
+    verbose: bool = False,
+) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), ScoringRequestHandler)
+    server.daemon_threads = True
+    server.service = service  # type: ignore[attr-defined]
+    server.verbose = verbose  # type: ignore[attr-defined]
+    return server
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Local HTTP scoring service for Buffett Lite.")
+    p.add_argument("--host", default="127.0.0.1", help="Bind address")
+    p.add_argument("--port", type=int, default=SERVICE_PORT, help="Bind port")
+    p.add_argument(
+        "--replay",
+        default="",
+        help="Serve recorded data from this directory instead of akshare (offline testing)",
+    )
+    p.add_argument("--verbose", action="store_true", help="Log every request")
+    return p.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.replay:
+        from lite_tool.replay import ReplayProvider
+
+        provider: AKShareProvider = ReplayProvider(Path(args.replay).expanduser().resolve())
+    else:
+        provider = AKShareProvider()
+    server = create_server(ScoringService(provider), args.host, args.port, args.verbose)
+    print(f"Scoring service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
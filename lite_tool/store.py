@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+import pandas as pd
+
+from .config import CACHE_DIR, HISTORY_MEMO_SIZE
+
+
+class PriceStore:
+    # Daily histories on disk (hist_{code}.csv) fronted by a bounded LRU that is
+    # shared by every session in the process. Frames handed out are shallow
+    # views of the stored frame: callers must treat them as read-only. Each
+    # entry remembers when it was written (file mtime for disk loads) so
+    # freshness can be judged against the trading calendar. Frames derived
+    # from a history (resampled bars) are memoized inside its entry, so they
+    # are dropped whenever the history is rewritten or evicted.
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_entries: int = HISTORY_MEMO_SIZE) -> None:
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memo: OrderedDict[str, Tuple[pd.DataFrame, float, Dict[str, pd.DataFrame]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, code: str) -> Path:
+        return self.cache_dir / f"hist_{code}.csv"
+
+    def _remember(self, code: str, df: pd.DataFrame, fetched_at: float) -> None:
+        with self._lock:
+            self._memo[code] = (df, fetched_at, {})
+            self._memo.move_to_end(code)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+    def load(self, code: str) -> pd.DataFrame | None:
+        with self._lock:
+            cached = self._memo.get(code)
+            if cached is not None:
+                self._memo.move_to_end(code)
+                return cached[0].copy(deep=False)
+        path = self.path(code)
+        try:
+            fetched_at = path.stat().st_mtime
+            df = pd.read_csv(path)
+        except Exception:
+            return None
+        self._remember(code, df, fetched_at)
+        return df.copy(deep=False)
+
+    def fetched_at(self, code: str) -> float | None:
+        with self._lock:
+            cached = self._memo.get(code)
+        if cached is not None:
+            return cached[1]
+        try:
+            return self.path(code).stat().st_mtime
+        except OSError:
+            return None
+
+    def view(
+        self,
+        code: str,
+        key: str,
+        build: Callable[[pd.DataFrame], pd.DataFrame],
+    ) -> pd.DataFrame | None:
+        with self._lock:
+            entry = self._memo.get(code)
+        if entry is None:
+            df = self.load(code)
+            if df is None:
+                return None
+            with self._lock:
+                entry = self._memo.get(code)
+            if entry is None:
+                return build(df)
+        df, _, views = entry
+        view = views.get(key)
+        if view is None:
+            view = build(df)
+            with self._lock:
+                views[key] = view
+        return view.copy(deep=False)
+
+    def save(self, code: str, df: pd.DataFrame) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        df.to_csv(self.path(code), index=False, encoding="utf-8")
+        self._remember(code, df, time.time())
+
+    def discard(self, code: str) -> None:
+        with self._lock:
+            self._memo.pop(code, None)
+
+    def memo_size(self) -> int:
+        with self._lock:
+            return len(self._memo)
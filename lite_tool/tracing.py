@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List
+
+TRACE_FILE_ENV = "LITE_TRACE_FILE"
+TRACE_PROM_ENV = "LITE_TRACE_PROM"
+
+
+@dataclass
+class Span:
+    name: str
+    started_at: float
+    duration_ms: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    thread: str = ""
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "ts": round(self.started_at, 6),
+            "duration_ms": round(self.duration_ms, 3),
+            "thread": self.thread,
+            **self.attrs,
+        }
+
+
+_collector: contextvars.ContextVar[List[Span] | None] = contextvars.ContextVar(
+    "lite_trace_collector", default=None
+)
+_lock = threading.Lock()
+_totals: Dict[str, List[float]] = {}
+
+
+def _write_jsonl(span: Span) -> None:
+    path = os.getenv(TRACE_FILE_ENV, "").strip()
+    if not path:
+        return
+    line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+    with _lock:
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    current = Span(
+        name=name,
+        started_at=time.time(),
+        attrs=dict(attrs),
+        thread=threading.current_thread().name,
+    )
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as exc:
+        current.attrs.setdefault("error", type(exc).__name__)
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - started) * 1000.0
+        with _lock:
+            totals = _totals.setdefault(name, [0.0, 0.0])
+            totals[0] += 1
+            totals[1] += current.duration_ms / 1000.0
+        collected = _collector.get()
+        if collected is not None:
+            collected.append(current)
+        _write_jsonl(current)
+
+
+@contextmanager
+def collect() -> Iterator[List[Span]]:
+    # Gathers every span finished in this context, including worker threads
+    # started through `bind`.
+    spans: List[Span] = []
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    # Thread pools do not inherit context variables; wrap the callable handed
+    # to `submit` so its spans reach the submitting run's collector.
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def stage_breakdown(spans: List[Span]) -> List[Dict[str, Any]]:
+    stages: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        row = stages.setdefault(s.name, {"stage": s.name, "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        row["count"] += 1
+        row["total_ms"] += s.duration_ms
+        row["max_ms"] = max(row["max_ms"], s.duration_ms)
+        if "cache" in s.attrs:
+            row["cache_hits"] = row.get("cache_hits", 0) + (s.attrs["cache"] == "hit")
+    rows = sorted(stages.values(), key=lambda r: r["total_ms"], reverse=True)
+    for row in rows:
+        row["total_ms"] = round(row["total_ms"], 1)
+        row["max_ms"] = round(row["max_ms"], 1)
+    return rows
+
+
+def prometheus_text() -> str:
+    with _lock:
+        snapshot = {name: list(values) for name, values in _totals.items()}
+    lines = [
+        "# HELP lite_stage_seconds_total Time spent per pipeline stage.",
+        "# TYPE lite_stage_seconds_total counter",
+    ]
+    for name, (_, seconds) in sorted(snapshot.items()):
+        lines.append(f'lite_stage_seconds_total{{stage="{name}"}} {seconds:.6f}')
+    lines.extend(
+        [
+            "# HELP lite_stage_calls_total Number of spans recorded per pipeline stage.",
+            "# TYPE lite_stage_calls_total counter",
+        ]
+    )
+    for name, (count, _) in sorted(snapshot.items()):
+        lines.append(f'lite_stage_calls_total{{stage="{name}"}} {int(count)}')
+    return "\n".join(lines) + "\n"
+
+
+def flush_metrics() -> None:
+    path = os.getenv(TRACE_PROM_ENV, "").strip()
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
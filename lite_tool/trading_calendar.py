@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterable, List
+
+from .config import (
+    CACHE_DIR,
+    CALENDAR_RETRY_SECONDS,
+    MARKET_CLOSE,
+    MARKET_OPEN,
+    MARKET_UTC_OFFSET_HOURS,
+    SESSION_SETTLE_MINUTES,
+)
+
+# China has no daylight saving time, so a fixed offset avoids depending on
+# tzdata (absent on a stock Windows install).
+MARKET_TZ = timezone(timedelta(hours=MARKET_UTC_OFFSET_HOURS))
+
+TradeDateLoader = Callable[[], Iterable[date]]
+
+
+def market_now() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+class TradingCalendar:
+    # SSE/SZSE trading days, cached as one CSV and refreshed only when the
+    # cached list no longer reaches today (akshare publishes the whole year).
+    # Without a usable list (first run offline) weekdays stand in for trading
+    # days; the download is retried after CALENDAR_RETRY_SECONDS.
+    def __init__(self, cache_path: Path, loader: TradeDateLoader | None = None) -> None:
+        self.cache_path = cache_path
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._dates: List[date] = []
+        self._date_set: set = set()
+        self._loaded = False
+        self._retry_after = 0.0
+        self._latest: tuple | None = None
+
+    def _read_cache(self) -> List[date]:
+        if not self.cache_path.exists():
+            return []
+        try:
+            lines = self.cache_path.read_text(encoding="utf-8").split()
+        except OSError:
+            return []
+        dates = []
+        for line in lines:
+            try:
+                dates.append(date.fromisoformat(line.strip()))
+            except ValueError:
+                continue
+        return sorted(set(dates))
+
+    def _write_cache(self, dates: List[date]) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_path.write_text("\n".join(d.isoformat() for d in dates) + "\n", encoding="utf-8")
+        except OSError:
+            pass
+
+    def _set_dates(self, dates: List[date]) -> None:
+        self._dates = dates
+        self._date_set = set(dates)
+
+    def _ensure_loaded(self) -> None:
+        today = market_now().date()
+        with self._lock:
+            if not self._loaded:
+                self._set_dates(self._read_cache())
+                self._loaded = True
+            if self._dates and self._dates[-1] >= today:
+                return
+            if self._loader is None or time.time() < self._retry_after:
+                return
+            try:
+                dates = sorted(set(self._loader()))
+            except Exception:
+                dates = []
+            if not dates:
+                self._retry_after = time.time() + CALENDAR_RETRY_SECONDS
+                return
+            self._set_dates(dates)
+            self._write_cache(dates)
+            if dates[-1] < today:
+                self._retry_after = time.time() + CALENDAR_RETRY_SECONDS
+
+    def is_trading_day(self, day: date) -> bool:
+        self._ensure_loaded()
+        if self._dates and self._dates[0] <= day <= self._dates[-1]:
+            return day in self._date_set
+        return day.weekday() < 5
+
+    def previous_session(self, day: date) -> date:
+        candidate = day - timedelta(days=1)
+        # The longest A-share closure (Spring Festival) is well under 30 days.
+        for _ in range(30):
+            if self.is_trading_day(candidate):
+                return candidate
+            candidate -= timedelta(days=1)
+        return candidate
+
+    def session_ready_at(self, day: date) -> datetime:
+        # Daily bars for `day` are considered published a little after close.
+        close = datetime(day.year, day.month, day.day, *MARKET_CLOSE, tzinfo=MARKET_TZ)
+        return close + timedelta(minutes=SESSION_SETTLE_MINUTES)
+
+    def latest_session(self, now: datetime | None = None) -> date:
+        # The most recent session whose daily bar is final. The answer only
+        # changes at today's settle time or at midnight, so it is memoized
+        # until then (it sits on every cache-hit path).
+        if now is None:
+            now = market_now()
+            memo = self._latest
+            if memo is not None and memo[0] <= now < memo[1]:
+                return memo[2]
+            session, valid_until = self._latest_session_at(now)
+            self._latest = (now, valid_until, session)
+            return session
+        return self._latest_session_at(now)[0]
+
+    def _latest_session_at(self, now: datetime) -> tuple:
+        today = now.date()
+        ready = self.session_ready_at(today)
+        midnight = datetime(today.year, today.month, today.day, tzinfo=MARKET_TZ) + timedelta(days=1)
+        if self.is_trading_day(today):
+            if now >= ready:
+                return today, midnight
+            return self.previous_session(today), ready
+        return self.previous_session(today), midnight
+
+    def in_trading_hours(self, now: datetime | None = None) -> bool:
+        now = now or market_now()
+        today = now.date()
+        if not self.is_trading_day(today):
+            return False
+        opened = datetime(today.year, today.month, today.day, *MARKET_OPEN, tzinfo=MARKET_TZ)
+        return opened <= now < self.session_ready_at(today)
+
+    def snapshot_session(self, fetched_at: float) -> date:
+        # The session a market-wide quote snapshot taken at `fetched_at`
+        # describes: today's once it has opened, otherwise the last one.
+        taken = datetime.fromtimestamp(fetched_at, MARKET_TZ)
+        day = taken.date()
+        opened = datetime(day.year, day.month, day.day, *MARKET_OPEN, tzinfo=MARKET_TZ)
+        if self.is_trading_day(day) and taken >= opened:
+            return day
+        return self.previous_session(day)
+
+    def is_current(self, last_bar: date, fetched_at: float | None = None) -> bool:
+        # A history is current when it was written after the latest session
+        # settled (this also covers suspended symbols, whose last bar
+        # legitimately lags), or already carries a bar for a later, still
+        # running session. A bar for the latest session written before it
+        # settled is provisional and not current.
+        session = self.latest_session()
+        if fetched_at is None:
+            return last_bar >= session
+        if fetched_at >= self.session_ready_at(session).timestamp():
+            return True
+        return last_bar > session
+
+    def snapshot_is_current(self, fetched_at: float) -> bool:
+        # Market-wide snapshots (spot quotes) only stop changing outside
+        # trading hours.
+        if self.in_trading_hours():
+            return False
+        return fetched_at >= self.session_ready_at(self.latest_session()).timestamp()
+
+
+_default_calendar: TradingCalendar | None = None
+_default_lock = threading.Lock()
+
+
+def default_calendar() -> TradingCalendar:
+    global _default_calendar
+    with _default_lock:
+        if _default_calendar is None:
+            from .akshare_provider import download_trade_dates
+
+            _default_calendar = TradingCalendar(CACHE_DIR / "trade_calendar.csv", loader=download_trade_dates)
+        return _default_calendar
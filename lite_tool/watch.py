@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from lite_tool.akshare_provider import AKShareProvider, Candidate
+from lite_tool.config import WATCH_SCORE_DELTA, WATCH_WORKERS
+from lite_tool.pipeline import fetch_and_score, parse_codes, refresh_latest_bars, schedule_candidates
+from lite_tool.run_cache import scoring_config_hash
+from lite_tool.tracing import bind
+from lite_tool.watchlist import ScoreHistory, WatchlistStore
+
+
+def data_fingerprint(hist: pd.DataFrame, fundamentals: Dict[str, float], config_hash: str) -> str:
+    # Changes whenever the scoring inputs do: a new or patched last bar, a
+    # rebuilt (re-adjusted) history, a new PE percentile or a scoring change.
+    last = hist.iloc[-1]
+    first = hist.iloc[0]
+    parts = [
+        str(len(hist)),
+        str(first["date"]),
+        str(first["close"]),
+        str(last["date"]),
+        str(last["close"]),
+        str(last.get("volume", "")),
+        str(round(fundamentals.get("pe_percentile", -1.0), 4)),
+        config_hash,
+    ]
+    return "|".join(parts)
+
+
+def reevaluate(
+    provider: AKShareProvider,
+    candidates: List[Candidate],
+    history: ScoreHistory,
+    threshold: float = WATCH_SCORE_DELTA,
+    force: bool = False,
+    workers: int = WATCH_WORKERS,
+) -> Dict[str, object]:
+    # Brings histories up to date (one spot snapshot for the latest bar where
+    # possible), then re-scores only symbols whose fingerprint differs from
+    # their last score_history row and reports signal changes and score
+    # moves of at least `threshold` points.
+    started = time.time()
+    config_hash = scoring_config_hash()
+    scheduled, cache_status = schedule_candidates(provider, candidates)
+    refresh_latest_bars(provider, scheduled, cache_status)
+    evaluated_at = datetime.now().isoformat(timespec="seconds")
+
+    def task(cand: Candidate) -> Dict[str, object]:
+        hist, error_type, error = provider.get_history_safe(cand.code)
+        if hist is None:
+            return {"code": cand.code, "name": cand.name, "status": "failed", "error_type": error_type, "error": error}
+        previous = history.last(cand.code)
+        fingerprint = data_fingerprint(hist, provider.valuation_inputs(cand.code), config_hash)
+        if not force and previous is not None and previous.get("fingerprint") == fingerprint:
+            return {"code": cand.code, "name": cand.name, "status": "unchanged"}
+        item = fetch_and_score(provider, cand, fetched=(hist, None, None))
+        if item.result is None:
+            error_type, error = item.error_type, item.error
+            return {"code": cand.code, "name": cand.name, "status": "failed", "error_type": error_type, "error": error}
+        result = item.result.to_dict()
+        history.append(cand.code, {**result, "evaluated_at": evaluated_at, "fingerprint": fingerprint})
+        return {"code": cand.code, "name": cand.name, "status": "scored", "result": result, "previous": previous}
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="lite-watch") as pool:
+        # One bound context per task: a context cannot be entered by two threads.
+        futures = [pool.submit(bind(task), cand) for cand in scheduled]
+        outcomes = [future.result() for future in futures]
+
+    deltas: List[Dict[str, object]] = []
+    failed: List[Dict[str, object]] = []
+    for outcome in outcomes:
+        if outcome["status"] == "failed":
+            failed.append({k: outcome[k] for k in ("code", "name", "error_type", "error")})
+            continue
+        if outcome["status"] != "scored":
+            continue
+        result, previous = outcome["result"], outcome["previous"]
+        if previous is None:
+            deltas.append(
+                {
+                    "code": result["code"],
+                    "name": result["name"],
+                    "change": "new",
+                    "score": result["score"],
+                    "signal": result["signal"],
+                }
+            )
+            continue
+        score_change = round(float(result["score"]) - float(previous["score"]), 1)
+        changes = []
+        if result["signal"] != previous["signal"]:
+            changes.append("signal")
+        if abs(score_change) >= threshold:
+            changes.append("score")
+        if changes:
+            deltas.append(
+                {
+                    "code": result["code"],
+                    "name": result["name"],
+                    "change": "+".join(changes),
+                    "previous_score": float(previous["score"]),
+                    "score": result["score"],
+                    "score_change": score_change,
+                    "previous_signal": previous["signal"],
+                    "signal": result["signal"],
+                    "previous_evaluated_at": previous["evaluated_at"],
+                }
+            )
+    deltas.sort(key=lambda d: abs(float(d.get("score_change", 0.0))), reverse=True)
+    return {
+        "evaluated_at": evaluated_at,
+        "symbols": len(candidates),
+        "rescored": sum(1 for o in outcomes if o["status"] == "scored"),
+        "unchanged": sum(1 for o in outcomes if o["status"] == "unchanged"),
+        "failed": failed,
+        "threshold": threshold,
+        "deltas": deltas,
+        "wall_seconds": round(time.time() - started, 3),
+    }
+
+
+def print_report(report: Dict[str, object]) -> None:
+    print(
+        f"[{report['evaluated_at']}] {report['symbols']} symbols: {report['rescored']} re-scored,"
+        f" {report['unchanged']} unchanged, {len(report['failed'])} failed ({report['wall_seconds']}s)"
+    )
+    for d in report["deltas"]:
+        if d["change"] == "new":
+            print(f"  {d['code']} {d['name']}: first score {d['score']} ({d['signal']})")
+            continue
+        signal = d["signal"] if d["signal"] == d["previous_signal"] else f"{d['previous_signal']} -> {d['signal']}"
+        print(f"  {d['code']} {d['name']}: {d['previous_score']} -> {d['score']} ({d['score_change']:+}), {signal}")
+    if not report["deltas"]:
+        print("  no changes above the threshold")
+
+
+def _watch_candidates(provider: AKShareProvider, watchlists: WatchlistStore, names: List[str]) -> List[Candidate]:
+    names = names or watchlists.names()
+    codes: List[str] = []
+    for name in names:
+        listed = watchlists.get(name)
+        if not listed:
+            raise SystemExit(f"Unknown or empty watchlist: {name}")
+        codes.extend(listed)
+    codes = list(dict.fromkeys(codes))
+    try:
+        name_map = provider.resolve_names(codes)
+    except Exception:
+        name_map = {}
+    return [Candidate(code=c, name=name_map.get(c, c)) for c in codes]
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Saved watchlists and delta re-evaluation.")
+    sub = p.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show saved watchlists")
+    save = sub.add_parser("save", help="Create or replace a watchlist")
+    save.add_argument("name")
+    src = save.add_mutually_exclusive_group(required=True)
+    src.add_argument("--codes", help="Codes separated by comma/space")
+    src.add_argument("--codes-file", help="Text file with codes (any separator)")
+    delete = sub.add_parser("delete", help="Delete a watchlist")
+    delete.add_argument("name")
+    run = sub.add_parser("run", help="Re-score changed symbols and report deltas")
+    run.add_argument("names", nargs="*", help="Watchlists to evaluate (default: all)")
+    run.add_argument(
+        "--threshold",
+        type=float,
+        default=WATCH_SCORE_DELTA,
+        help="Report score moves of at least this many points",
+    )
+    run.add_argument("--force", action="store_true", help="Re-score every symbol even if its data is unchanged")
+    run.add_argument("--every", type=float, default=0.0, help="Repeat every N minutes (0 = run once)")
+    run.add_argument("--out", default="", help="Also write the latest report to this JSON file")
+    hist = sub.add_parser("history", help="Show the recorded score history of a symbol")
+    hist.add_argument("code")
+    hist.add_argument("--limit", type=int, default=20)
+    return p.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    watchlists = WatchlistStore()
+    history = ScoreHistory()
+
+    if args.command == "list":
+        for name in watchlists.names():
+            codes = watchlists.get(name)
+            print(f"{name} ({len(codes)}): {' '.join(codes)}")
+        return
+    if args.command == "save":
+        raw = args.codes or Path(args.codes_file).expanduser().read_text(encoding="utf-8")
+        codes = parse_codes(raw)
+        if not codes:
+            raise SystemExit("No valid codes.")
+        watchlists.save(args.name, codes)
+        print(f"Saved {args.name}: {len(codes)} codes")
+        return
+    if args.command == "delete":
+        if not watchlists.delete(args.name):
+            raise SystemExit(f"Unknown watchlist: {args.name}")
+        print(f"Deleted {args.name}")
+        return
+    if args.command == "history":
+        for row in history.records(args.code)[-args.limit:]:
+            print(f"{row['evaluated_at']}  {row['score']:>5}  {row['signal']}  {row['risk_tag']}")
+        return
+
+    provider = AKShareProvider()
+    while True:
+        candidates = _watch_candidates(provider, watchlists, args.names)
+        if not candidates:
+            raise SystemExit("No saved watchlists; create one with `save`.")
+        report = reevaluate(provider, candidates, history, threshold=args.threshold, force=args.force)
+        print_report(report)
+        if args.out:
+            out_path = Path(args.out).expanduser()
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        if args.every <= 0:
+            return
+        args.force = False
+        time.sleep(args.every * 60.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .config import STATE_DIR
+
+# Kept free of pandas so the app can list saved watchlists on every rerun.
+
+SCORE_HISTORY_FIELDS = [
+    "evaluated_at",
+    "fingerprint",
+    "score",
+    "signal",
+    "risk_tag",
+    "valuation_score",
+    "quality_score",
+    "momentum_score",
+    "volatility_score",
+    "pe_percentile",
+]
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return (-1, -1)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Parsed watchlist files per process, keyed by path. The app lists them on
+# every rerun, so the file is only parsed again when its stamp changes.
+_lists_lock = threading.Lock()
+_lists_memo: Dict[Path, Tuple[Tuple[int, int], Dict[str, List[str]]]] = {}
+
+
+class WatchlistStore:
+    # Named code lists in one JSON file under STATE_DIR, shared by the app and
+    # the re-evaluation job. Reads come from a per-process memo that is
+    # checked against the file's mtime, so lists saved by another process
+    # show up on the next call; save/delete write through.
+    def __init__(self, path: Path = STATE_DIR / "watchlists.json") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _parse(self) -> Dict[str, List[str]]:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(raw, dict):
+            return {}
+        return {str(name): [str(c) for c in codes] for name, codes in raw.items() if isinstance(codes, list)}
+
+    def _read(self) -> Dict[str, List[str]]:
+        # Shared with other callers: treat as read-only.
+        stamp = _file_stamp(self.path)
+        with _lists_lock:
+            memo = _lists_memo.get(self.path)
+        if memo is not None and memo[0] == stamp:
+            return memo[1]
+        lists = self._parse()
+        with _lists_lock:
+            _lists_memo[self.path] = (stamp, lists)
+        return lists
+
+    def _write(self, lists: Dict[str, List[str]]) -> None:
+        _write_atomic(self.path, json.dumps(lists, ensure_ascii=False, indent=2))
+        with _lists_lock:
+            _lists_memo[self.path] = (_file_stamp(self.path), lists)
+
+    def names(self) -> List[str]:
+        return sorted(self._read())
+
+    def get(self, name: str) -> List[str]:
+        return list(self._read().get(name, []))
+
+    def save(self, name: str, codes: List[str]) -> None:
+        name = name.strip()
+        if not name:
+            raise ValueError("自选名单名称不能为空。")
+        with self._lock:
+            lists = dict(self._read())
+            lists[name] = list(dict.fromkeys(codes))
+            self._write(lists)
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            lists = dict(self._read())
+            if lists.pop(name, None) is None:
+                return False
+            self._write(lists)
+            return True
+
+
+class ScoreHistory:
+    # One append-only CSV per symbol (score_history/{code}.csv). A row is
+    # written only when the symbol was re-scored; `fingerprint` identifies
+    # the input data it was scored on.
+    def __init__(self, history_dir: Path = STATE_DIR / "score_history") -> None:
+        self.history_dir = history_dir
+        self._lock = threading.Lock()
+
+    def path(self, code: str) -> Path:
+        return self.history_dir / f"{code}.csv"
+
+    def records(self, code: str) -> List[Dict[str, str]]:
+        try:
+            with self.path(code).open("r", encoding="utf-8", newline="") as f:
+                return list(csv.DictReader(f))
+        except OSError:
+            return []
+
+    def last(self, code: str) -> Dict[str, str] | None:
+        records = self.records(code)
+        return records[-1] if records else None
+
+    def append(self, code: str, row: Dict[str, object]) -> None:
+        path = self.path(code)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not path.exists()
+            with path.open("a", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=SCORE_HISTORY_FIELDS, extrasaction="ignore")
+                if new_file:
+                    writer.writeheader()
+                writer.writerow({k: "" if row.get(k) is None else row.get(k) for k in SCORE_HISTORY_FIELDS})